@@ -1242,6 +1242,31 @@ def kennerspiel(
     )
 
 
+@task()
+def renderjson(batch_size=1_000, dry_run=False):
+    """Store every game's rendered API representation in the database."""
+    LOGGER.info("Rendering the API representation of all games")
+    django.core.management.call_command(
+        "renderjson",
+        batch=parse_int(batch_size),
+        dry_run=parse_bool(dry_run),
+    )
+
+
+@task()
+def searchindex(batch_size=10_000):
+    """Build the full-text search index over game names."""
+    LOGGER.info("Building the full-text search index")
+    django.core.management.call_command("searchindex", batch=parse_int(batch_size))
+
+
+@task()
+def statssnapshot(out_file=SETTINGS.STATS_SNAPSHOT_PATH):
+    """Precompute the unfiltered games stats for the current model version."""
+    LOGGER.info("Precomputing games stats into <%s>", out_file)
+    django.core.management.call_command("statssnapshot", out_file=out_file)
+
+
 @task()
 def compressdb(db_file=os.path.join(DATA_DIR, "db.sqlite3")):
     """compress SQLite database file"""
@@ -1273,6 +1298,27 @@ def cplight(
     shutil.copy2(src_path, dst_path)
 
 
+@task()
+def similargames(
+    recommender=os.path.join(DATA_DIR, "recommender_light.npz"),
+    out_dir=os.path.join(DATA_DIR, "similar_games"),
+    top=500,
+):
+    """Precompute the most similar games for every game."""
+    LOGGER.info(
+        "Writing the top %s similar games from <%s> to <%s>...",
+        top,
+        recommender,
+        out_dir,
+    )
+    django.core.management.call_command(
+        "similargames",
+        recommender=recommender,
+        out_dir=out_dir,
+        top=parse_int(top),
+    )
+
+
 @task()
 def dateflag(dst=SETTINGS.MODEL_UPDATED_FILE, date=None):
     """write date to file"""
@@ -1683,13 +1729,17 @@ def sitemap(url=URL_LIVE, dst=os.path.join(DATA_DIR, "sitemap.xml"), limit=50_00
     cleandata,
     filldb,
     kennerspiel,
+    renderjson,
+    searchindex,
     dateflag,
+    statssnapshot,
     # TODO Those three steps don't really belong to builddb
     # splitall,
     # historicalbggrankings,
     # weeklycharts,
     compressdb,
     cplight,
+    similargames,
     sitemap,
 )
 def builddb():
@@ -1,9 +1,18 @@
 """ app config """
 
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class GamesConfig(AppConfig):
     """games config"""
 
     name = "games"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel
+        from .database import configure_sqlite
+
+        connection_created.connect(
+            configure_sqlite, dispatch_uid="games.database.configure_sqlite"
+        )
@@ -0,0 +1,189 @@
+"""In-process caches shared between requests."""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+
+from django.conf import settings
+
+from .database import database_path
+from .utils import model_updated_at
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by size and/or number of entries.
+
+    Either bound may be None for no limit. Entries may expire after a TTL. If
+    a version is passed to get() or set() and it differs from the one the
+    cache was filled with, all entries are dropped first.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.version = None
+        self.size = 0
+        self.counters = Counter()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: Optional[Hashable]) -> None:
+        if version is None or version == self.version:
+            return
+        if self.version is not None:
+            LOGGER.info("Data version changed, dropping %d entries", len(self))
+            self.counters["invalidations"] += 1
+        self._entries.clear()
+        self.size = 0
+        self.version = version
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_bytes is not None and self.size > self.max_bytes)
+            or (self.max_entries is not None and len(self) > self.max_entries)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.size -= size
+            self.counters["evictions"] += 1
+
+    def get(
+        self,
+        key: Hashable,
+        *,
+        version: Optional[Hashable] = None,
+        label: Optional[str] = None,
+        default: Any = None,
+    ) -> Any:
+        """Cached value for the key, or the default on a miss."""
+
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[2] is not None and entry[2] <= time.time():
+                del self._entries[key]
+                self.size -= entry[1]
+                self.counters["expirations"] += 1
+                entry = None
+
+            result = "misses" if entry is None else "hits"
+            self.counters[result] += 1
+            if label:
+                self.counters[f"{label}_{result}"] += 1
+
+            if entry is None:
+                return default
+
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        *,
+        size: int = 0,
+        ttl: Optional[float] = None,
+        version: Optional[Hashable] = None,
+    ) -> bool:
+        """Store the value unless it is larger than the whole cache."""
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.counters["oversized"] += 1
+            return False
+
+        expires = time.time() + ttl if ttl else None
+
+        with self._lock:
+            self._check_version(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, size, expires)
+            self.size += size
+            self._evict()
+
+        return True
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def info(self) -> dict:
+        """Counters and current usage."""
+        with self._lock:
+            return {
+                "entries": len(self),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                **self.counters,
+            }
+
+
+def _mtime(path: Optional[str]) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def _data_version() -> tuple:
+    paths = (
+        database_path(),
+        getattr(settings, "LIGHT_RECOMMENDER_PATH", None),
+        getattr(settings, "MODEL_UPDATED_FILE", None),
+    )
+    return (model_updated_at(),) + tuple(_mtime(path) for path in paths)
+
+
+@lru_cache(maxsize=1)
+def version_cache() -> LRUCache:
+    """Process wide cache for the data version."""
+    return LRUCache(max_entries=1)
+
+
+def data_version() -> tuple:
+    """Model update time and modification times of the data files.
+
+    Looked up at most once per settings.DATA_VERSION_TTL seconds, so changes
+    may take that long to be noticed.
+    """
+
+    ttl = settings.DATA_VERSION_TTL
+    if not ttl:
+        return _data_version()
+
+    cache = version_cache()
+    version = cache.get("data_version")
+    if version is None:
+        version = _data_version()
+        cache.set("data_version", version, ttl=ttl)
+    return version
+
+
+@lru_cache(maxsize=1)
+def response_cache() -> LRUCache:
+    """Process wide cache for rendered responses."""
+    return LRUCache(max_bytes=settings.RESPONSE_CACHE_MAX_BYTES)
+
+
+@lru_cache(maxsize=1)
+def count_cache() -> LRUCache:
+    """Process wide cache for the result counts of paginated querysets."""
+    return LRUCache(max_entries=settings.COUNT_CACHE_MAX_ENTRIES)
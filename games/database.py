@@ -0,0 +1,95 @@
+"""SQLite connection setup."""
+
+import logging
+import os
+import sqlite3
+import timeit
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from django.conf import settings
+
+LOGGER = logging.getLogger(__name__)
+
+# Keeps the shared in-memory database alive for the lifetime of the process
+_MEMORY_CONNECTION = None
+
+
+def database_path(alias="default"):
+    """File path of the SQLite database, also if configured as a URI.
+
+    For an in-memory copy, this is the file it was loaded from.
+    """
+    name = str(settings.DATABASES[alias]["NAME"])
+    if "mode=memory" in name:
+        return getattr(settings, "SQLITE_PATH", None)
+    if name.startswith("file:"):
+        return url2pathname(urlparse(name).path)
+    return name
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource  # pylint: disable=import-outside-toplevel
+
+        # Peak rather than current RSS, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def load_into_memory(source=None, target=None):
+    """Copy the SQLite file into the shared in-memory database.
+
+    The target must be a shared-cache memory URI as configured in DATABASES,
+    so every connection opened by Django reads from the same copy.
+    """
+
+    global _MEMORY_CONNECTION  # pylint: disable=global-statement
+
+    source = source or settings.SQLITE_PATH
+    target = target or settings.DATABASES["default"]["NAME"]
+
+    LOGGER.info("Copying database <%s> into memory <%s>", source, target)
+    rss_before = _rss_bytes()
+    start = timeit.default_timer()
+
+    memory = sqlite3.connect(target, uri=True, check_same_thread=False)
+    disk = sqlite3.connect(Path(source).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        disk.backup(memory)
+    finally:
+        disk.close()
+
+    if _MEMORY_CONNECTION is not None:
+        _MEMORY_CONNECTION.close()
+    _MEMORY_CONNECTION = memory
+
+    (page_count,) = memory.execute("PRAGMA page_count").fetchone()
+    (page_size,) = memory.execute("PRAGMA page_size").fetchone()
+    LOGGER.info(
+        "Copied %.1f MB into memory in %.1f seconds, RSS grew by %.1f MB",
+        page_count * page_size / 1024 / 1024,
+        timeit.default_timer() - start,
+        (_rss_bytes() - rss_before) / 1024 / 1024,
+    )
+
+    return memory
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to every new SQLite connection."""
+
+    if connection.vendor != "sqlite":
+        return
+
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None) or {}
+    if not pragmas:
+        return
+
+    LOGGER.debug("Setting SQLite pragmas: %s", pragmas)
+    with connection.cursor() as cursor:
+        for key, value in pragmas.items():
+            cursor.execute(f"PRAGMA {key} = {value}")
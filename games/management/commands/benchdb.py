@@ -0,0 +1,94 @@
+"""Compare API latency with default and tuned SQLite connections."""
+
+import logging
+import sys
+import timeit
+from statistics import mean, median
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from ...database import database_path
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Compare API latency with default and tuned SQLite connections."""
+
+    help = "Compare API latency with default and tuned SQLite connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls",
+            nargs="*",
+            default=("/api/games/", "/api/games/stats/", "/api/rankings/"),
+            help="API endpoints to request",
+        )
+        parser.add_argument(
+            "--number", "-n", type=int, default=20, help="requests per endpoint"
+        )
+
+    def _measure(self, client, urls, number):
+        result = {}
+        for url in urls:
+            durations = []
+            for _ in range(number):
+                start = timeit.default_timer()
+                response = client.get(url, HTTP_ACCEPT="application/json")
+                durations.append(timeit.default_timer() - start)
+                if response.status_code != 200:
+                    LOGGER.warning("<%s> returned %d", url, response.status_code)
+            result[url] = durations
+        return result
+
+    def handle(self, *args, **kwargs):
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if kwargs["verbosity"] > 1 else logging.INFO,
+            format="%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s] %(message)s",
+        )
+
+        LOGGER.info(kwargs)
+
+        client = Client(SERVER_NAME="localhost")
+        tuned = dict(connection.settings_dict)
+        setups = {
+            "default": ({"NAME": database_path(), "CONN_MAX_AGE": 0}, {}),
+            "tuned": (
+                {"NAME": tuned["NAME"], "CONN_MAX_AGE": tuned["CONN_MAX_AGE"]},
+                settings.SQLITE_PRAGMAS,
+            ),
+        }
+
+        results = {}
+        for setup, (settings_dict, pragmas) in setups.items():
+            LOGGER.info(
+                "Measuring %s connections: %s %s", setup, settings_dict, pragmas
+            )
+            connection.close()
+            connection.settings_dict.update(settings_dict)
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                # warm up
+                self._measure(client, kwargs["urls"], 1)
+                results[setup] = self._measure(client, kwargs["urls"], kwargs["number"])
+
+        connection.close()
+        connection.settings_dict.update(tuned)
+
+        for url in kwargs["urls"]:
+            default = results["default"][url]
+            tuned = results["tuned"][url]
+            LOGGER.info(
+                "<%s>: mean %.1f ms vs %.1f ms, median %.1f ms vs %.1f ms "
+                "(default vs tuned, speed-up %.2fx)",
+                url,
+                1000 * mean(default),
+                1000 * mean(tuned),
+                1000 * median(default),
+                1000 * median(tuned),
+                mean(default) / mean(tuned),
+            )
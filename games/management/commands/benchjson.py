@@ -0,0 +1,78 @@
+"""Compare JSON render times of a page of games."""
+
+import logging
+import sys
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from ...models import Game
+from ...renderers import FastJSONRenderer, orjson
+from ...serializers import serialize_games
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Compare JSON render times of a page of games."""
+
+    help = "Compare JSON render times of a page of games."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", "-s", type=int, default=100, help="number of games per page"
+        )
+        parser.add_argument(
+            "--number", "-n", type=int, default=1_000, help="number of renders"
+        )
+
+    def handle(self, *args, **kwargs):
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if kwargs["verbosity"] > 1 else logging.INFO,
+            format="%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s] %(message)s",
+        )
+
+        LOGGER.info(kwargs)
+
+        if orjson is None:
+            LOGGER.warning("<orjson> is not installed, FastJSONRenderer falls back")
+
+        # pylint: disable=no-member
+        bgg_ids = Game.objects.order_by("-num_votes").values_list("bgg_id", flat=True)
+        games = serialize_games(bgg_ids[: kwargs["size"]])
+        if not games:
+            raise CommandError("No games found in the database")
+        # Same structure as a paginated API response
+        data = {
+            "count": len(games),
+            "next": None,
+            "previous": None,
+            "results": games,
+        }
+
+        outputs = {}
+        durations = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            name = type(renderer).__name__
+            outputs[name] = renderer.render(data)
+            durations[name] = timeit.timeit(
+                lambda renderer=renderer: renderer.render(data),
+                number=kwargs["number"],
+            )
+            LOGGER.info(
+                "%s: %.3f ms per page of %d games (%d bytes)",
+                name,
+                1000 * durations[name] / kwargs["number"],
+                len(games),
+                len(outputs[name]),
+            )
+
+        if outputs["JSONRenderer"] != outputs["FastJSONRenderer"]:
+            LOGGER.warning("Rendered output differs between the renderers")
+
+        LOGGER.info(
+            "Speed-up: %.1fx",
+            durations["JSONRenderer"] / durations["FastJSONRenderer"],
+        )
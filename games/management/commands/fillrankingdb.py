@@ -11,10 +11,12 @@ from pathlib import Path
 
 import pandas as pd
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from pytility import arg_to_iter, batchify, parse_date
 from snaptime import snap
 
-from ...models import Game, Ranking
+from ...models import Game, Ranking, RankingDate, RankingSeries
+from ...timeseries import DateCollector, SeriesCollector
 from ...utils import format_from_path
 
 csv.field_size_limit(sys.maxsize)
@@ -200,7 +202,7 @@ class Command(BaseCommand):
             "-b",
             type=int,
             default=100_000,
-            help="batch size for DB transactions",
+            help="batch size for DB inserts",
         )
         parser.add_argument(
             "--types",
@@ -216,6 +218,16 @@ class Command(BaseCommand):
             choices=WEEK_DAYS,
             help="anchor week day when aggregating weeks",
         )
+        parser.add_argument(
+            "--storage",
+            "-s",
+            default="both",
+            choices=("rows", "series", "both"),
+            help="write one row per ranking, packed series per game and type, or "
+            "both; the rankings API only serves rows, so databases for production "
+            "need both, and the size win of series is deferred until rows can be "
+            "dropped; series alone is only meant for testing and size comparisons",
+        )
         parser.add_argument(
             "--dry-run",
             "-n",
@@ -223,24 +235,77 @@ class Command(BaseCommand):
             help="don't write to the database",
         )
 
-    def _create_all_instances(self, path, filter_ids=None, week_day="SUN", types=None):
-        types = frozenset(arg_to_iter(types))
-        for ranking_type, (
-            sub_dir,
-            method,
-            min_date,
-            min_score,
-        ) in self.ranking_types.items():
-            if not types or ranking_type in types:
-                yield from _create_instances(
-                    path_dir=os.path.join(path, sub_dir),
-                    ranking_type=ranking_type,
-                    filter_ids=filter_ids,
-                    method=method,
-                    week_day=week_day,
-                    min_date=min_date,
-                    min_score=min_score,
-                )
+    def _create_type_instances(
+        self, path, ranking_type, filter_ids=None, week_day="SUN"
+    ):
+        sub_dir, method, min_date, min_score = self.ranking_types[ranking_type]
+        return _create_instances(
+            path_dir=os.path.join(path, sub_dir),
+            ranking_type=ranking_type,
+            filter_ids=filter_ids,
+            method=method,
+            week_day=week_day,
+            min_date=min_date,
+            min_score=min_score,
+        )
+
+    @staticmethod
+    def _fill_type(ranking_type, instances, storage="both", batch=None, dry_run=False):
+        """Replace the rankings of one type, holding only its series in memory."""
+
+        write_rows = storage in ("rows", "both")
+        collector = SeriesCollector() if storage != "rows" else None
+        # The catalogue summarises the rows, so it's only written along with them
+        dates = DateCollector() if write_rows else None
+        batches = batchify(instances, batch) if batch else (instances,)
+
+        with transaction.atomic():
+            if write_rows and not dry_run:
+                deleted, _ = Ranking.objects.filter(ranking_type=ranking_type).delete()
+                LOGGER.info("Deleted %d previous <%s> rankings", deleted, ranking_type)
+                deleted, _ = RankingDate.objects.filter(
+                    ranking_type=ranking_type
+                ).delete()
+                LOGGER.info("Deleted %d previously catalogued dates", deleted)
+            if collector is not None and not dry_run:
+                deleted, _ = RankingSeries.objects.filter(
+                    ranking_type=ranking_type
+                ).delete()
+                LOGGER.info("Deleted %d previously packed series", deleted)
+
+            for count, items in enumerate(batches):
+                LOGGER.info("Processing batch #%d...", count + 1)
+                items = list(items)
+                for item in items:
+                    if dates is not None:
+                        dates.add(item)
+                    if collector is not None:
+                        collector.add(item)
+                if not write_rows:
+                    continue
+                if dry_run:
+                    for item in items:
+                        print(item)
+                else:
+                    Ranking.objects.bulk_create(items)
+
+            if collector is not None:
+                LOGGER.info("Packing %d ranking series...", len(collector))
+                series = collector.series()
+                if dry_run:
+                    for item in series:
+                        print(item)
+                else:
+                    for items in batchify(series, batch or 10_000):
+                        RankingSeries.objects.bulk_create(items)
+
+            if dates is not None:
+                LOGGER.info("Cataloguing %d ranking dates...", len(dates))
+                if dry_run:
+                    for item in dates.dates():
+                        print(item)
+                else:
+                    RankingDate.objects.bulk_create(dates.dates(), batch_size=10_000)
 
     def handle(self, *args, **kwargs):
         logging.basicConfig(
@@ -251,24 +316,30 @@ class Command(BaseCommand):
 
         LOGGER.info(kwargs)
 
+        if kwargs["storage"] == "series":
+            LOGGER.warning("Not writing ranking rows, the rankings API will be empty")
+
         # pylint: disable=no-member
         game_ids = frozenset(Game.objects.order_by().values_list("bgg_id", flat=True))
-        instances = self._create_all_instances(
-            path=kwargs["path"],
-            filter_ids=game_ids,
-            week_day=kwargs["week_day"],
-            types=kwargs["types"],
-        )
-        batches = (
-            batchify(instances, kwargs["batch"]) if kwargs["batch"] else (instances,)
-        )
-
-        for count, batch in enumerate(batches):
-            LOGGER.info("Processing batch #%d...", count + 1)
-            if kwargs["dry_run"]:
-                for item in batch:
-                    print(item)
-            else:
-                Ranking.objects.bulk_create(batch)
+        types = frozenset(arg_to_iter(kwargs["types"]))
+
+        # One type at a time, so only that type's series are held in memory
+        for ranking_type in self.ranking_types:
+            if types and ranking_type not in types:
+                continue
+            LOGGER.info("Filling rankings of type <%s>...", ranking_type)
+            instances = self._create_type_instances(
+                path=kwargs["path"],
+                ranking_type=ranking_type,
+                filter_ids=game_ids,
+                week_day=kwargs["week_day"],
+            )
+            self._fill_type(
+                ranking_type=ranking_type,
+                instances=instances,
+                storage=kwargs["storage"],
+                batch=kwargs["batch"],
+                dry_run=kwargs["dry_run"],
+            )
 
         LOGGER.info("Done filling the database.")
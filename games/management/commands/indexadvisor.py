@@ -0,0 +1,242 @@
+"""Replay a query workload through EXPLAIN QUERY PLAN and propose indexes."""
+
+import logging
+import re
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from ...database import database_path
+
+LOGGER = logging.getLogger(__name__)
+
+# A mix of the front end's typical requests
+DEFAULT_URLS = (
+    "/api/games/",
+    "/api/games/?ordering=-bgg_rank",
+    "/api/games/?min_players__lte=4&max_players__gte=4&max_time__lte=60",
+    "/api/games/?year__gte=2020&complexity__lte=3&ordering=-num_votes",
+    "/api/games/?search=catan",
+    "/api/games/stats/",
+    "/api/games/history/?ranking_type=r_g",
+    "/api/games/recommend/",
+    "/api/rankings/",
+    "/api/rankings/?ranking_type=bgg",
+    "/api/rankings/dates/?ranking_type=bgg",
+    "/api/rankings/games/?ranking_type=r_g",
+    "/api/categories/",
+    "/api/mechanics/",
+)
+
+COLUMN = r'"(\w+)"\."(\w+)"'
+EQUALITY_REGEX = re.compile(COLUMN + r"\s+(?:=|IN\s*\(|IS\s+NULL)", re.IGNORECASE)
+RANGE_REGEX = re.compile(COLUMN + r"\s+(?:<=?|>=?|BETWEEN)\s", re.IGNORECASE)
+ORDER_REGEX = re.compile(COLUMN + r"\s+(?:ASC|DESC)", re.IGNORECASE)
+SCAN_REGEX = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+INDEX_REGEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+TEMP_REGEX = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+class Command(BaseCommand):
+    """Replay a query workload through EXPLAIN QUERY PLAN and propose indexes."""
+
+    help = "Replay a query workload through EXPLAIN QUERY PLAN and propose indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            "-u",
+            nargs="+",
+            help="API URLs whose queries make up the workload "
+            "(default: a built-in mix of typical requests)",
+        )
+        parser.add_argument(
+            "--sql-file",
+            "-s",
+            help="file with captured SQL statements, one per line, "
+            "to add to the workload",
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="create the proposed indexes in an in-memory copy "
+            "and explain the workload again",
+        )
+
+    def _capture(self, urls):
+        client = Client(SERVER_NAME="localhost")
+        statements = []
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, HTTP_ACCEPT="application/json")
+            if response.status_code != 200:
+                LOGGER.warning("<%s> returned %d", url, response.status_code)
+            statements.extend(query["sql"] for query in context.captured_queries)
+        LOGGER.info("Captured %d statements from %d URLs", len(statements), len(urls))
+        return statements
+
+    @staticmethod
+    def _explain(db, statements):
+        plans = []
+        for sql in statements:
+            try:
+                rows = db.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            except sqlite3.Error as exc:
+                LOGGER.debug("Unable to explain <%s>: %s", sql, exc)
+                continue
+            plans.append((sql, [row[-1] for row in rows]))
+        return plans
+
+    @staticmethod
+    def _analyse(plans):
+        scans = Counter()
+        temps = Counter()
+        used = set()
+        problems = []
+
+        for sql, details in plans:
+            scanned = set()
+            temp = False
+            for detail in details:
+                used.update(INDEX_REGEX.findall(detail))
+                match = SCAN_REGEX.match(detail)
+                if match:
+                    scanned.add(match.group(1))
+                    scans[match.group(1)] += 1
+                match = TEMP_REGEX.search(detail)
+                if match:
+                    temp = True
+                    temps[match.group(1)] += 1
+            if scanned or temp:
+                problems.append((sql, scanned, temp))
+
+        return scans, temps, used, problems
+
+    @staticmethod
+    def _propose(sql, scanned, temp, primary_keys):
+        order_by = sql.rsplit(" ORDER BY ", 1)[1] if " ORDER BY " in sql else ""
+        where = sql.rsplit(" ORDER BY ", 1)[0]
+
+        equality = defaultdict(list)
+        for table, column in EQUALITY_REGEX.findall(where):
+            equality[table].append(column)
+        ranges = defaultdict(list)
+        for table, column in RANGE_REGEX.findall(where):
+            ranges[table].append(column)
+        ordering = defaultdict(list)
+        for table, column in ORDER_REGEX.findall(order_by):
+            ordering[table].append(column)
+
+        candidates = set(scanned)
+        if temp:
+            candidates.update(ordering)
+
+        for table in candidates & frozenset(primary_keys):
+            # Lookups by primary key only touch a few rows anyway
+            if primary_keys[table] in equality[table]:
+                continue
+            # equality columns first, then the sort order, then one range
+            columns = _unique(equality[table] + ordering[table] + ranges[table][:1])
+            if columns:
+                yield table, tuple(columns)
+
+    @staticmethod
+    def _field_names(table, columns):
+        for model in apps.get_app_config("games").get_models():
+            if model._meta.db_table == table:
+                by_column = {field.column: field.name for field in model._meta.fields}
+                return model.__name__, [by_column.get(col, col) for col in columns]
+        return table, list(columns)
+
+    def handle(self, *args, **kwargs):
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if kwargs["verbosity"] > 1 else logging.INFO,
+            format="%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s] %(message)s",
+        )
+
+        LOGGER.info(kwargs)
+
+        if connection.vendor != "sqlite":
+            raise CommandError("The index advisor only supports SQLite")
+
+        statements = self._capture(kwargs["url"] or DEFAULT_URLS)
+        if kwargs["sql_file"]:
+            with open(kwargs["sql_file"], encoding="utf-8") as file:
+                statements.extend(line.strip() for line in file if line.strip())
+        statements = [sql for sql in _unique(statements) if sql.startswith("SELECT")]
+        LOGGER.info("Explaining %d distinct statements", len(statements))
+
+        source = sqlite3.connect(database_path())
+        db = sqlite3.connect(":memory:")
+        source.backup(db)
+        source.close()
+
+        primary_keys = {
+            model._meta.db_table: model._meta.pk.column
+            for model in apps.get_app_config("games").get_models()
+        }
+        indexes = {
+            name: table
+            for name, table in db.execute(
+                "SELECT name, tbl_name FROM sqlite_master "
+                "WHERE type = 'index' AND sql IS NOT NULL"
+            )
+            if table in primary_keys
+        }
+
+        plans = self._explain(db, statements)
+        scans, temps, used, problems = self._analyse(plans)
+
+        self.stdout.write(f"Explained {len(plans)} statements")
+        self.stdout.write("\nFull table scans:")
+        for table, count in scans.most_common():
+            self.stdout.write(f"  {table}: {count}")
+        self.stdout.write("\nTemporary B-trees:")
+        for purpose, count in temps.most_common():
+            self.stdout.write(f"  {purpose}: {count}")
+
+        proposals = Counter()
+        for sql, scanned, temp in problems:
+            for proposal in self._propose(sql, scanned, temp, primary_keys):
+                proposals[proposal] += 1
+
+        self.stdout.write("\nProposed indexes (number of statements that benefit):")
+        for (table, columns), count in proposals.most_common():
+            name = f"{table}_{'_'.join(columns)}_idx"[:60]
+            model, fields = self._field_names(table, columns)
+            self.stdout.write(
+                f"  [{count}] CREATE INDEX {name} ON {table} ({', '.join(columns)});"
+            )
+            self.stdout.write(f"      {model}.Meta.indexes: Index(fields={fields})")
+
+        self.stdout.write("\nIndexes never used by this workload:")
+        for name, table in sorted(indexes.items(), key=lambda item: item[::-1]):
+            if name not in used:
+                self.stdout.write(f"  {table}.{name}")
+
+        if not kwargs["verify"] or not proposals:
+            return
+
+        for table, columns in proposals:
+            name = f"{table}_{'_'.join(columns)}_idx"[:60]
+            db.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+
+        scans_after, temps_after, _, _ = self._analyse(self._explain(db, statements))
+        self.stdout.write("\nWith the proposed indexes:")
+        self.stdout.write(
+            f"  full table scans: {sum(scans.values())} -> {sum(scans_after.values())}"
+        )
+        self.stdout.write(
+            f"  temporary B-trees: {sum(temps.values())} -> {sum(temps_after.values())}"
+        )
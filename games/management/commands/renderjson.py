@@ -0,0 +1,82 @@
+"""Render every game's API representation and store it in the database."""
+
+import logging
+import sys
+
+from django.core.management.base import BaseCommand
+from django.db.transaction import atomic
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from tqdm import tqdm
+
+from ...models import Game, GameJson
+from ...serializers import FastGameSerializer, game_value_fields
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Render every game's API representation and store it in the database."""
+
+    help = "Render every game's API representation and store it in the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            "-b",
+            type=int,
+            default=1_000,
+            help="batch size for DB transactions",
+        )
+        parser.add_argument(
+            "--dry-run", "-n", action="store_true", help="do not write to DB"
+        )
+
+    def handle(self, *args, **kwargs):
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if kwargs["verbosity"] > 1 else logging.INFO,
+            format="%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s] %(message)s",
+        )
+
+        LOGGER.info(kwargs)
+
+        batch_size = kwargs["batch"]
+        dry_run = kwargs["dry_run"]
+        # Store the same bytes the API would render
+        renderer_class = next(
+            (
+                renderer_class
+                for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES
+                if renderer_class.format == "json"
+            ),
+            JSONRenderer,
+        )
+        renderer = renderer_class()
+
+        # pylint: disable=no-member
+        bgg_ids = tuple(
+            Game.objects.order_by("bgg_id").values_list("bgg_id", flat=True)
+        )
+        LOGGER.info("Rendering %d games", len(bgg_ids))
+
+        with atomic():
+            if not dry_run:
+                deleted, _ = GameJson.objects.all().delete()
+                LOGGER.info("Deleted %d previously rendered games", deleted)
+
+            for start in tqdm(range(0, len(bgg_ids), batch_size)):
+                rows = Game.objects.filter(
+                    bgg_id__in=bgg_ids[start : start + batch_size]
+                ).values(*game_value_fields())
+                instances = [
+                    GameJson(
+                        game_id=item["bgg_id"],
+                        data=renderer.render(item).decode("utf-8"),
+                    )
+                    for item in FastGameSerializer(rows).data
+                ]
+                if not dry_run:
+                    GameJson.objects.bulk_create(instances)
+
+        LOGGER.info("Done.")
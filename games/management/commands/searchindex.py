@@ -0,0 +1,50 @@
+"""Build the full-text search index over game names."""
+
+import logging
+import sys
+
+from django.core.management.base import BaseCommand
+
+from ...search import build_search_index
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Build the full-text search index over game names.
+
+    The index is an FTS5 virtual table that no migration creates, so this
+    command has to run after every (re)build of the database. Without the
+    index, search falls back to case-insensitive substring matching with LIKE.
+    SQLite older than 3.34 has no trigram tokenizer; the index then matches
+    word prefixes only, so e.g. "burg" finds "Burgundy" but not "Hamburg".
+    """
+
+    help = (
+        "Build the full-text search index over game names. No migration creates "
+        "the index, so run this after every database build, otherwise search "
+        "falls back to LIKE. On SQLite older than 3.34 the index matches word "
+        "prefixes instead of substrings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            "-b",
+            type=int,
+            default=10_000,
+            help="batch size for DB inserts",
+        )
+
+    def handle(self, *args, **kwargs):
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if kwargs["verbosity"] > 1 else logging.INFO,
+            format="%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s] %(message)s",
+        )
+
+        LOGGER.info(kwargs)
+
+        tokenizer = build_search_index(batch_size=kwargs["batch"])
+
+        LOGGER.info("Done building search index with <%s> tokenizer.", tokenizer)
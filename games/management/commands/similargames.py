@@ -0,0 +1,131 @@
+"""Precompute the most similar games for every game."""
+
+import logging
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tqdm import tqdm
+
+from ...masks import GameMasks
+from ...models import Game
+from ...similarity import BGG_ID_FILE, NEIGHBOURS_FILE, SCORES_FILE
+from ...utils import load_recommender
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Precompute the most similar games for every game."""
+
+    help = "Precompute the most similar games for every game."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recommender",
+            "-r",
+            default=settings.LIGHT_RECOMMENDER_PATH,
+            help="light recommender file",
+        )
+        parser.add_argument(
+            "--out-dir",
+            "-o",
+            default=settings.SIMILAR_GAMES_PATH,
+            help="output directory",
+        )
+        parser.add_argument(
+            "--top",
+            "-t",
+            type=int,
+            default=500,
+            help="number of similar games to store per game",
+        )
+        parser.add_argument(
+            "--batch",
+            "-b",
+            type=int,
+            default=1_000,
+            help="number of games to process at once",
+        )
+
+    def handle(self, *args, **kwargs):
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if kwargs["verbosity"] > 1 else logging.INFO,
+            format="%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s] %(message)s",
+        )
+
+        LOGGER.info(kwargs)
+
+        recommender = load_recommender(path=kwargs["recommender"], site="light")
+        if recommender is None:
+            raise CommandError(f"Unable to load recommender <{kwargs['recommender']}>")
+
+        masks = GameMasks(recommender.items_labels)
+        game_ids = masks.game_ids
+        num_games = masks.size
+        top = min(kwargs["top"], num_games)
+        LOGGER.info("Finding the %d most similar games for %d games", top, num_games)
+
+        # pylint: disable=no-member
+        db_ids = Game.objects.order_by().values_list("bgg_id", flat=True)
+        # Only games in the database can be recommended, never compilations
+        excluded = ~np.isin(game_ids, np.fromiter(db_ids, dtype=np.int64))
+        excluded |= masks.compilations
+
+        # Cluster edges grouped by their source game
+        sources, targets = masks.cluster_edges
+        order = np.argsort(sources, kind="stable")
+        sources, targets = sources[order], targets[order]
+
+        factors = recommender.items_factors[:, :-1]
+        norms = np.linalg.norm(factors, axis=0)
+        norms[norms == 0] = 1
+        factors = factors / norms
+
+        neighbours = np.full((num_games, top), -1, dtype=np.int32)
+        scores = np.full((num_games, top), np.nan, dtype=np.float32)
+
+        for start in tqdm(range(0, num_games, kwargs["batch"])):
+            stop = min(start + kwargs["batch"], num_games)
+            similarities = factors[:, start:stop].T @ factors
+            similarities[:, excluded] = -np.inf
+
+            for row, pos in enumerate(range(start, stop)):
+                similarities[row, pos] = -np.inf
+                left, right = np.searchsorted(
+                    sources, [game_ids[pos], game_ids[pos] + 1]
+                )
+                similarities[row, targets[left:right]] = -np.inf
+
+            best = np.argpartition(-similarities, top - 1, axis=1)[:, :top]
+            best_scores = np.take_along_axis(similarities, best, axis=1)
+            best_order = np.argsort(-best_scores, axis=1, kind="stable")
+            best = np.take_along_axis(best, best_order, axis=1)
+            best_scores = np.take_along_axis(best_scores, best_order, axis=1)
+
+            found = np.isfinite(best_scores)
+            neighbours[start:stop][found] = game_ids[best[found]]
+            scores[start:stop][found] = best_scores[found]
+
+        # Store rows ordered by BGG ID for binary search
+        rows = np.argsort(game_ids, kind="stable")
+        out_dir = Path(kwargs["out_dir"]).resolve()
+        out_dir.mkdir(parents=True, exist_ok=True)
+        LOGGER.info("Writing similar games to <%s>", out_dir)
+
+        for file_name, data in (
+            (BGG_ID_FILE, game_ids[rows].astype(np.int32)),
+            (SCORES_FILE, scores[rows]),
+            # neighbours last: its presence marks a complete table
+            (NEIGHBOURS_FILE, neighbours[rows]),
+        ):
+            tmp_path = out_dir / f".{file_name}"
+            with open(tmp_path, "wb") as file:
+                np.save(file, data)
+            os.replace(tmp_path, out_dir / file_name)
+
+        LOGGER.info("Done.")
@@ -0,0 +1,53 @@
+"""Precompute the unfiltered games stats for the current model version."""
+
+import logging
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...stats import write_stats_snapshot
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _parse_variant(value):
+    top_games, top_items = value.split(":")
+    return int(top_games), int(top_items)
+
+
+class Command(BaseCommand):
+    """Precompute the unfiltered games stats for the current model version."""
+
+    help = "Precompute the unfiltered games stats for the current model version."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--out-file",
+            "-o",
+            default=settings.STATS_SNAPSHOT_PATH,
+            help="output JSON file",
+        )
+        parser.add_argument(
+            "--variants",
+            "-V",
+            nargs="+",
+            type=_parse_variant,
+            help="<top_games>:<top_items> combinations to precompute "
+            "(default: settings.STATS_SNAPSHOT_VARIANTS)",
+        )
+
+    def handle(self, *args, **kwargs):
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if kwargs["verbosity"] > 1 else logging.INFO,
+            format="%(asctime)s %(levelname)-8.8s [%(name)s:%(lineno)s] %(message)s",
+        )
+
+        LOGGER.info(kwargs)
+
+        count = write_stats_snapshot(
+            path=kwargs["out_file"], variants=kwargs["variants"]
+        )
+
+        LOGGER.info("Done writing %d stats variants.", count)
@@ -0,0 +1,177 @@
+"""Boolean masks over the games known to the light recommender."""
+
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from django.utils.functional import cached_property
+from pytility import arg_to_iter
+
+from .caches import data_version
+from .models import Collection, Game
+
+LOGGER = logging.getLogger(__name__)
+
+
+def to_id_array(bgg_ids) -> np.ndarray:
+    """Convert the given IDs into a NumPy array of integers."""
+    if isinstance(bgg_ids, np.ndarray):
+        return bgg_ids.astype(np.int64, copy=False)
+    return np.fromiter(arg_to_iter(bgg_ids), dtype=np.int64)
+
+
+class UserCollection:
+    """Compact view of a user's collection."""
+
+    def __init__(self, user: str):
+        rows = tuple(
+            Collection.objects.filter(user=user)
+            .order_by()
+            .values_list("game_id", "rating", "owned", "wishlist", "play_count")
+        )
+        self.user = user
+        self.game_ids = np.fromiter((row[0] for row in rows), dtype=np.int64)
+        self.rating = np.array(
+            [np.nan if row[1] is None else row[1] for row in rows], dtype=float
+        )
+        self.owned = np.fromiter((bool(row[2]) for row in rows), dtype=bool)
+        self.wishlist = np.array(
+            [np.nan if row[3] is None else row[3] for row in rows], dtype=float
+        )
+        self.play_count = np.fromiter((row[4] or 0 for row in rows), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def known(self) -> np.ndarray:
+        """Games the user rated."""
+        return ~np.isnan(self.rating)
+
+    def wishlisted(self, priority: int) -> np.ndarray:
+        """Games on the wishlist with at least the given priority."""
+        with np.errstate(invalid="ignore"):
+            return self.wishlist <= priority
+
+    def played(self, play_count: int) -> np.ndarray:
+        """Games played at least the given number of times."""
+        return self.play_count >= play_count
+
+    def summary(self, bgg_ids) -> Dict[str, int]:
+        """Number of the given games the user owns, played and rated."""
+        selected = np.isin(self.game_ids, to_id_array(bgg_ids))
+        return {
+            "owned": int((selected & self.owned).sum()),
+            "played": int((selected & self.played(1)).sum()),
+            "rated": int((selected & self.known()).sum()),
+        }
+
+    def select(
+        self,
+        *,
+        exclude_known: bool = True,
+        exclude_owned: bool = True,
+        exclude_wishlist: Optional[int] = None,
+        exclude_play_count: Optional[int] = None,
+    ) -> np.ndarray:
+        """IDs of the games matching any of the given criteria."""
+
+        selection = np.zeros(len(self), dtype=bool)
+        if exclude_known:
+            selection |= self.known()
+        if exclude_owned:
+            selection |= self.owned
+        if exclude_wishlist:
+            selection |= self.wishlisted(exclude_wishlist)
+        if exclude_play_count:
+            selection |= self.played(exclude_play_count)
+        return self.game_ids[selection]
+
+
+@lru_cache(maxsize=256)
+def _user_collection(user: str, version) -> UserCollection:
+    return UserCollection(user)
+
+
+def user_collection(user: str) -> UserCollection:
+    """Load (and cache) a user's collection for the current data version."""
+    return _user_collection(user, data_version())
+
+
+class GameMasks:
+    """Boolean masks indexed by the order of the games in the light recommender."""
+
+    def __init__(self, game_ids: Iterable[int]):
+        self.game_ids = to_id_array(game_ids)
+        self.size = len(self.game_ids)
+        self._sorter = np.argsort(self.game_ids, kind="stable")
+        self._sorted_ids = self.game_ids[self._sorter]
+
+    def empty(self) -> np.ndarray:
+        """Mask without any games."""
+        return np.zeros(self.size, dtype=bool)
+
+    def full(self) -> np.ndarray:
+        """Mask with all games."""
+        return np.ones(self.size, dtype=bool)
+
+    def indexes(self, bgg_ids) -> np.ndarray:
+        """Positions of the given games, silently dropping unknown ones."""
+
+        bgg_ids = to_id_array(bgg_ids)
+        if not self.size or not len(bgg_ids):
+            return np.empty(0, dtype=np.intp)
+
+        positions = np.searchsorted(self._sorted_ids, bgg_ids)
+        positions[positions >= self.size] = 0
+        found = self._sorted_ids[positions] == bgg_ids
+        return self._sorter[positions[found]]
+
+    def mask(self, bgg_ids=None) -> np.ndarray:
+        """Mask with the given games."""
+        result = self.empty()
+        result[self.indexes(bgg_ids)] = True
+        return result
+
+    def ids(self, mask: np.ndarray) -> np.ndarray:
+        """IDs of the games in the mask."""
+        return self.game_ids[mask]
+
+    @cached_property
+    def compilations(self) -> np.ndarray:
+        """Mask with all compilations."""
+        # pylint: disable=no-member
+        compilations = (
+            Game.objects.filter(compilation=True)
+            .order_by()
+            .values_list("bgg_id", flat=True)
+        )
+        return self.mask(compilations)
+
+    @cached_property
+    def cluster_edges(self):
+        """Cluster pairs as BGG IDs of the source and positions of the target games."""
+        # pylint: disable=no-member
+        pairs = tuple(
+            Game.cluster.through.objects.order_by().values_list(
+                "to_game_id", "from_game_id"
+            )
+        )
+        sources = np.fromiter((pair[0] for pair in pairs), dtype=np.int64)
+        targets = np.fromiter((pair[1] for pair in pairs), dtype=np.int64)
+        known = np.isin(targets, self.game_ids)
+        LOGGER.info("Loaded %d cluster edges", known.sum())
+        return sources[known], self.indexes(targets[known])
+
+    def cluster_mates(self, bgg_ids) -> np.ndarray:
+        """Mask with all games sharing a cluster with any of the given games."""
+        sources, targets = self.cluster_edges
+        result = self.empty()
+        result[targets[np.isin(sources, to_id_array(bgg_ids))]] = True
+        return result
+
+
+@lru_cache(maxsize=8)
+def game_masks(recommender) -> GameMasks:
+    """Masks for the games known to the given recommender."""
+    return GameMasks(recommender.items_labels)
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.22 on 2026-10-18 12:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameJson',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rendered_json', serialize=False, to='games.game')),
+                ('data', models.TextField()),
+            ],
+        ),
+    ]
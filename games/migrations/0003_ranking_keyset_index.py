@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_gamejson'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ranking',
+            index=models.Index(fields=['ranking_type', 'date', 'rank'], name='games_ranki_ranking_e0f1ff_idx'),
+        ),
+    ]
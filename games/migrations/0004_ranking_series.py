@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0003_ranking_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingSeries',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranking_type', models.CharField(choices=[('bgg', 'BoardGameGeek'), ('r_g', 'Recommend.Games'), ('fac', 'Factor'), ('sim', 'Similarity'), ('cha', 'Charts')], default='bgg', max_length=3)),
+                ('count', models.PositiveIntegerField()),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('best_rank', models.PositiveIntegerField()),
+                ('best_date', models.DateField()),
+                ('dates', models.BinaryField()),
+                ('ranks', models.BinaryField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranking_series', to='games.game')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='rankingseries',
+            index=models.Index(fields=['ranking_type', 'best_rank'], name='games_ranki_ranking_2e71a8_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='rankingseries',
+            unique_together={('game', 'ranking_type')},
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:32
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def fill_ranking_dates(apps, schema_editor):
+    Ranking = apps.get_model('games', 'Ranking')
+    RankingDate = apps.get_model('games', 'RankingDate')
+    dates = (
+        Ranking.objects.order_by()
+        .values('ranking_type', 'date')
+        .annotate(count=Count('id'), min_rank=Min('rank'), max_rank=Max('rank'))
+    )
+    RankingDate.objects.bulk_create(
+        (RankingDate(**values) for values in dates.iterator()), batch_size=10_000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0004_ranking_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingDate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranking_type', models.CharField(choices=[('bgg', 'BoardGameGeek'), ('r_g', 'Recommend.Games'), ('fac', 'Factor'), ('sim', 'Similarity'), ('cha', 'Charts')], default='bgg', max_length=3)),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField()),
+                ('min_rank', models.PositiveIntegerField()),
+                ('max_rank', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ('ranking_type', 'date'),
+                'unique_together': {('ranking_type', 'date')},
+            },
+        ),
+        migrations.RunPython(fill_ranking_dates, migrations.RunPython.noop),
+    ]
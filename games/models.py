@@ -1,7 +1,9 @@
 """ models """
 
+from django.conf import settings
 from django.db.models import (
     CASCADE,
+    BinaryField,
     BooleanField,
     CharField,
     DateField,
@@ -11,6 +13,7 @@ from django.db.models import (
     Index,
     ManyToManyField,
     Model,
+    OneToOneField,
     PositiveIntegerField,
     PositiveSmallIntegerField,
     SmallIntegerField,
@@ -46,11 +49,58 @@ class Ranking(Model):
         """Meta."""
 
         ordering = ("ranking_type", "date", "rank")
+        indexes = (Index(fields=("ranking_type", "date", "rank")),)
 
     def __str__(self):
         return f"#{self.rank}: {self.game} ({self.ranking_type}, {self.date})"
 
 
+class RankingDate(Model):
+    """Catalogue of the dates with rankings of a type."""
+
+    ranking_type = CharField(max_length=3, choices=Ranking.TYPES, default=Ranking.BGG)
+    date = DateField()
+    count = PositiveIntegerField()
+    min_rank = PositiveIntegerField()
+    max_rank = PositiveIntegerField()
+
+    class Meta:
+        """Meta."""
+
+        ordering = ("ranking_type", "date")
+        unique_together = (("ranking_type", "date"),)
+
+    def __str__(self):
+        return f"{self.ranking_type}, {self.date}: {self.count} rankings"
+
+
+class RankingSeries(Model):
+    """All rankings of a game and type, packed by games.timeseries."""
+
+    game = ForeignKey("Game", on_delete=CASCADE, related_name="ranking_series")
+    ranking_type = CharField(max_length=3, choices=Ranking.TYPES, default=Ranking.BGG)
+    count = PositiveIntegerField()
+    first_date = DateField()
+    last_date = DateField()
+    best_rank = PositiveIntegerField()
+    best_date = DateField()
+    # run-length encoded date ordinal differences and ranks
+    dates = BinaryField()
+    ranks = BinaryField()
+
+    class Meta:
+        """Meta."""
+
+        unique_together = (("game", "ranking_type"),)
+        indexes = (Index(fields=("ranking_type", "best_rank")),)
+
+    def __str__(self):
+        return (
+            f"{self.game_id} ({self.ranking_type}, "
+            f"{self.count} rankings from {self.first_date} to {self.last_date})"
+        )
+
+
 class Game(Model):
     """game model"""
 
@@ -125,6 +175,16 @@ class Game(Model):
 
     def highest_ranking(self, ranking_type=Ranking.BGG):
         """Find the highest ever rank of the given type."""
+        if getattr(settings, "RANKING_SERIES_ENABLED", False):
+            # pylint: disable=no-member
+            series = self.ranking_series.filter(ranking_type=ranking_type).first()
+            if series is not None:
+                return Ranking(
+                    game=self,
+                    ranking_type=ranking_type,
+                    rank=series.best_rank,
+                    date=series.best_date,
+                )
         return (
             # pylint: disable=no-member
             self.ranking_set.filter(ranking_type=ranking_type)
@@ -157,6 +217,19 @@ class Game(Model):
         return str(self.name)
 
 
+class GameJson(Model):
+    """Game as rendered by the API, stored at build time."""
+
+    game = OneToOneField(
+        Game, on_delete=CASCADE, primary_key=True, related_name="rendered_json"
+    )
+    data = TextField()
+
+    def __str__(self):
+        # pylint: disable=no-member
+        return str(self.game_id)
+
+
 class Person(Model):
     """person model"""
 
@@ -0,0 +1,45 @@
+"""Pagination."""
+
+from django.conf import settings
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+from .caches import count_cache, data_version
+
+
+class CachedCountPaginator(DjangoPaginator):
+    """Paginator that caches the counts of querysets per data version.
+
+    Counts are keyed by the queryset's SQL and parameters, i.e., by its
+    normalized filters. Misses fall back to the exact count.
+    """
+
+    @cached_property
+    def count(self):
+        if not settings.COUNT_CACHE_ENABLED or not isinstance(
+            self.object_list, QuerySet
+        ):
+            return super().count
+
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+            key = (self.object_list.model._meta.label, sql, params)
+            hash(key)
+        except Exception:  # pylint: disable=broad-except
+            return super().count
+
+        cache = count_cache()
+        version = data_version()
+        count = cache.get(key, version=version, label="count")
+        if count is None:
+            count = super().count
+            cache.set(key, count, version=version)
+        return count
+
+
+class CachedCountPagination(PageNumberPagination):
+    """Page number pagination with cached counts."""
+
+    django_paginator_class = CachedCountPaginator
@@ -0,0 +1,55 @@
+"""Renderers."""
+
+import logging
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer backed by orjson, falling back to DRF's renderer.
+
+    Output matches JSONRenderer with the default compact, strict and unicode
+    settings, except that orjson writes floats below 1e-3 in a different (but
+    equivalent) notation and non-finite floats as null instead of failing.
+    Indented output, other settings, data orjson cannot serialize and a
+    missing orjson library are all handled by the regular JSONRenderer.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+
+    def _fast_path(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.encoder_class is JSONEncoder
+            and self.compact
+            and self.strict
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self._fast_path(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=self.options,
+            )
+        except orjson.JSONEncodeError:
+            LOGGER.debug("Falling back to JSONRenderer", exc_info=True)
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, see there for details
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
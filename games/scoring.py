@@ -0,0 +1,193 @@
+"""Score recommendation candidates and rank only as many as needed."""
+
+from collections import namedtuple
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .masks import game_masks, user_collection
+
+RankedGame = namedtuple("RankedGame", ("bgg_id", "score", "rank"))
+
+
+class RankedGames:
+    """Candidates with scores, sorted lazily when sliced.
+
+    Behaves like a sequence, so it can be handed to Django's paginator: the
+    length is the number of candidates, but slicing only partially sorts the
+    scores up to the end of the requested slice.
+    """
+
+    def __init__(self, game_ids: np.ndarray, scores: np.ndarray):
+        self.game_ids = game_ids
+        self.scores = scores
+        self._order = np.empty(0, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def top(self, count: int) -> np.ndarray:
+        """Positions of the best scoring candidates, in descending order."""
+
+        count = min(max(count, 0), len(self))
+        if count <= len(self._order):
+            return self._order[:count]
+
+        negated = -self.scores
+        threshold = (
+            np.partition(negated, count - 1)[count - 1]
+            if 0 < count < len(self) // 2
+            else np.nan
+        )
+        if np.isnan(threshold):
+            self._order = np.argsort(negated, kind="stable")
+        else:
+            # Ties at the threshold go to the first candidates, like a stable sort
+            better = np.flatnonzero(negated < threshold)
+            tied = np.flatnonzero(negated == threshold)[: count - len(better)]
+            positions = np.concatenate((better, tied))
+            self._order = positions[np.lexsort((positions, negated[positions]))]
+        return self._order[:count]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            order = self.top(stop)
+            return [
+                RankedGame(
+                    bgg_id=int(self.game_ids[pos]),
+                    score=self.scores[pos],
+                    rank=rank + 1,
+                )
+                for rank, pos in zip(range(start, stop, step), order[start:stop:step])
+            ]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("index out of range")
+        return self[key : key + 1][0]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def _user_indexes(recommender, users: Iterable[str]) -> np.ndarray:
+    return np.array([recommender.users_indexes[user] for user in users], dtype=np.intp)
+
+
+def users_scores(recommender, users: List[str], positions: np.ndarray) -> np.ndarray:
+    """Scores of the given users for the games at the given positions."""
+
+    user_indexes = _user_indexes(recommender, users)
+    return (
+        recommender.users_factors[user_indexes]
+        @ recommender.items_factors[:, positions]
+        + recommender.users_linear_terms[user_indexes].reshape(-1, 1)
+        + recommender.items_linear_terms[positions].reshape(1, -1)
+        + recommender.intercept
+    )
+
+
+def similarity_scores(
+    recommender,
+    like_positions: np.ndarray,
+    positions: np.ndarray,
+) -> np.ndarray:
+    """Average cosine similarity between the liked games and the candidates."""
+
+    like_factors = recommender.items_factors[:, like_positions]
+    factors = recommender.items_factors[:, positions]
+    similarities = (like_factors.T @ factors) / np.outer(
+        np.linalg.norm(like_factors, axis=0),
+        np.linalg.norm(factors, axis=0),
+    )
+    return similarities.mean(axis=0)
+
+
+def _weighted_mean(scores: np.ndarray, users: List[str]) -> np.ndarray:
+    weights = np.array(
+        [user_collection(user).known().sum() for user in users], dtype=float
+    )
+    return np.average(scores, axis=0, weights=weights if weights.sum() else None)
+
+
+AGGREGATIONS = {
+    "mean": lambda scores, _: scores.mean(axis=0),
+    "min": lambda scores, _: scores.min(axis=0),
+    "least_misery": lambda scores, _: scores.min(axis=0),
+    "median": lambda scores, _: np.median(scores, axis=0),
+    "weighted": _weighted_mean,
+}
+
+
+def rank_users(
+    recommender,
+    users: List[str],
+    candidates: np.ndarray,
+    aggregation: str = "mean",
+) -> RankedGames:
+    """Rank the candidates by the aggregated score of the given users.
+
+    Aggregation is one of AGGREGATIONS: the mean, the minimum ("least misery"),
+    the median or the mean weighted by how many games each user rated.
+    """
+    positions = np.flatnonzero(candidates)
+    scores = users_scores(recommender, users, positions)
+    scores = AGGREGATIONS[aggregation](scores, users)
+    return RankedGames(game_masks(recommender).game_ids[positions], scores)
+
+
+def rank_similar(recommender, like: List[int], candidates: np.ndarray) -> RankedGames:
+    """Rank the candidates by their similarity to the liked games."""
+    masks = game_masks(recommender)
+    positions = np.flatnonzero(candidates)
+    scores = similarity_scores(recommender, masks.indexes(like), positions)
+    return RankedGames(masks.game_ids[positions], scores)
+
+
+def _top_per_row(scores: np.ndarray, count: int):
+    count = min(count, scores.shape[1])
+    if count <= 0:
+        empty = np.empty((scores.shape[0], 0), dtype=np.intp)
+        return empty, scores[:, :0]
+    top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(top, order, axis=1),
+        np.take_along_axis(top_scores, order, axis=1),
+    )
+
+
+def top_per_user(
+    recommender,
+    users: List[str],
+    candidates: np.ndarray,
+    count: int,
+    excluded: Optional[Callable[[str], Optional[np.ndarray]]] = None,
+    batch_size: int = 256,
+) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+    """Yield the best candidates and their scores for each user.
+
+    Users are scored in batches with a single matrix product each. If given,
+    `excluded` returns a mask (indexed like the recommender's games) of games
+    to skip for a single user.
+    """
+
+    masks = game_masks(recommender)
+    positions = np.flatnonzero(candidates)
+    game_ids = masks.game_ids[positions]
+
+    for start in range(0, len(users), batch_size):
+        batch = users[start : start + batch_size]
+        scores = users_scores(recommender, batch, positions)
+
+        for row, user in enumerate(batch):
+            user_excluded = excluded(user) if excluded is not None else None
+            if user_excluded is not None:
+                scores[row, user_excluded[positions]] = -np.inf
+
+        top, top_scores = _top_per_row(scores, count)
+        for user, games, games_scores in zip(batch, top, top_scores):
+            keep = np.isfinite(games_scores)
+            yield user, game_ids[games[keep]], games_scores[keep]
@@ -0,0 +1,126 @@
+"""Full-text search index over game names, backed by SQLite FTS5."""
+
+import logging
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import connection
+from django.db.utils import DatabaseError
+
+from .caches import data_version
+from .models import Game
+
+LOGGER = logging.getLogger(__name__)
+
+SEARCH_TABLE = "games_game_search"
+TRIGRAM = "trigram"
+UNICODE = "unicode61"
+
+
+def _create_table(cursor, tokenizer: str) -> None:
+    options = (
+        "tokenize='trigram'"
+        if tokenizer == TRIGRAM
+        else "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+    )
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(name, alt_name, {options})"
+    )
+
+
+def build_search_index(batch_size: int = 10_000) -> str:
+    """(Re)create the search index from all games, return the tokenizer used.
+
+    Trigrams match anywhere in a name, but need SQLite 3.34 or newer; older
+    versions fall back to word prefixes.
+    """
+
+    # pylint: disable=no-member
+    games = Game.objects.order_by("bgg_id").values_list("bgg_id", "name", "alt_name")
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        try:
+            _create_table(cursor, TRIGRAM)
+            tokenizer = TRIGRAM
+        except DatabaseError:
+            LOGGER.warning("Trigram tokenizer not available, indexing word prefixes")
+            _create_table(cursor, UNICODE)
+            tokenizer = UNICODE
+
+        insert = (
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, alt_name) VALUES (%s, %s, %s)"
+        )
+        rows = []
+        for bgg_id, name, alt_name in games.iterator(chunk_size=batch_size):
+            rows.append((bgg_id, name or "", "\n".join(alt_name or ())))
+            if len(rows) >= batch_size:
+                cursor.executemany(insert, rows)
+                rows = []
+        if rows:
+            cursor.executemany(insert, rows)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+
+    _search_tokenizer.cache_clear()
+    return tokenizer
+
+
+@lru_cache(maxsize=8)
+def _search_tokenizer(version) -> Optional[str]:
+    if connection.vendor != "sqlite":
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [SEARCH_TABLE],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        LOGGER.exception("Unable to look up search index")
+        return None
+    if not row:
+        LOGGER.warning("No search index, run the searchindex command")
+        return None
+    return TRIGRAM if TRIGRAM in row[0] else UNICODE
+
+
+def search_tokenizer() -> Optional[str]:
+    """Tokenizer of the search index, or None if there is no index."""
+    return _search_tokenizer(data_version())
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_condition(
+    terms: Iterable[str],
+) -> Optional[Tuple[str, List[str], Optional[str]]]:
+    """Condition on the search table matching all terms.
+
+    Returns the SQL, its parameters and the FTS5 query (for ranking), or None
+    if there is no index. Trigrams can't match terms shorter than three
+    characters, so those are matched with LIKE on the indexed names instead.
+    """
+
+    tokenizer = search_tokenizer()
+    terms = [term for term in terms if term]
+    if tokenizer is None or not terms:
+        return None
+
+    short = [term for term in terms if tokenizer == TRIGRAM and len(term) < 3]
+    suffix = "" if tokenizer == TRIGRAM else "*"
+    quoted = [term.replace('"', '""') for term in terms if term not in short]
+    query = " ".join(f'"{term}"{suffix}' for term in quoted) or None
+
+    clauses = [f"{SEARCH_TABLE} MATCH %s"] if query else []
+    params = [query] if query else []
+    for term in short:
+        clauses.append("(name LIKE %s ESCAPE '\\' OR alt_name LIKE %s ESCAPE '\\')")
+        params.extend((_like_pattern(term),) * 2)
+
+    return " AND ".join(clauses), params, query
@@ -1,7 +1,16 @@
 """ serializers """
 
+import json
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from django.utils.functional import cached_property
+from rest_framework.relations import ManyRelatedField
 from rest_framework.serializers import (
+    BooleanField,
     CharField,
+    FloatField,
     IntegerField,
     ListField,
     ModelSerializer,
@@ -14,6 +23,7 @@ from .models import (
     Category,
     Collection,
     Game,
+    GameJson,
     GameType,
     Mechanic,
     Person,
@@ -53,6 +63,221 @@ class GameSerializer(ModelSerializer):
         fields = "__all__"
 
 
+Relation = namedtuple("Relation", ("through", "source", "target", "ordering"))
+
+
+def _converter(field):
+    if isinstance(field, BooleanField):
+        return bool
+    if isinstance(field, IntegerField):
+        return int
+    if isinstance(field, FloatField):
+        return float
+    return str
+
+
+def _relation(source):
+    model_field = Game._meta.get_field(source)
+    if model_field.concrete:
+        m2m = model_field
+        from_field, to_field = m2m.m2m_field_name(), m2m.m2m_reverse_field_name()
+    else:
+        m2m = model_field.field
+        from_field, to_field = m2m.m2m_reverse_field_name(), m2m.m2m_field_name()
+    ordering = tuple(
+        f"-{to_field}__{order[1:]}" if order.startswith("-") else f"{to_field}__{order}"
+        for order in model_field.related_model._meta.ordering
+    )
+    return Relation(m2m.remote_field.through, from_field, to_field, ordering)
+
+
+@lru_cache(maxsize=1)
+def _game_fields():
+    """(name, kind, source or converter) for every field of GameSerializer."""
+    fields = []
+    for name, field in GameSerializer().fields.items():
+        if isinstance(field, ManyRelatedField):
+            names = isinstance(field.child_relation, StringRelatedField)
+            fields.append((name, "names" if names else "ids", field.source))
+        elif isinstance(field, ListField):
+            fields.append((name, "list", _converter(field.child)))
+        else:
+            fields.append((name, "value", _converter(field)))
+    return tuple(fields)
+
+
+def game_field_names():
+    """Names of all fields GameSerializer renders, in order."""
+    return tuple(name for name, _, _ in _game_fields())
+
+
+def _selected_fields(fields=None):
+    if fields is None:
+        return _game_fields()
+    fields = frozenset(fields)
+    return tuple(field for field in _game_fields() if field[0] in fields)
+
+
+def game_value_fields(fields=None):
+    """Model fields FastGameSerializer needs in every row.
+
+    Restricted to the given fields (if any), but always including bgg_id.
+    """
+    names = tuple(
+        name for name, kind, _ in _selected_fields(fields) if kind in ("value", "list")
+    )
+    return names if "bgg_id" in names else ("bgg_id",) + names
+
+
+def prefetch_game_relations(queryset, prefix=""):
+    """Prefetch the relations GameSerializer renders, loading only needed fields.
+
+    Use prefix (e.g., "game__") for querysets of models pointing to games.
+    """
+
+    sources = {}
+    for _, kind, source in _game_fields():
+        if kind in ("ids", "names"):
+            sources[source] = sources.get(source, False) or kind == "names"
+
+    prefetches = []
+    for source, names in sources.items():
+        model = Game._meta.get_field(source).related_model
+        fields = ("name",) if names else (model._meta.pk.name,)
+        prefetches.append(
+            Prefetch(prefix + source, queryset=model.objects.only(*fields))
+        )
+
+    return queryset.prefetch_related(*prefetches)
+
+
+class FastGameSerializer:
+    """Read-only replacement for GameSerializer(many=True).
+
+    Renders exactly the same data, but from values() rows (or model instances)
+    and with one query per relation for all games instead of one per game. If
+    fields are given, only those are rendered and only their relations queried.
+    """
+
+    def __init__(self, instance=None, many=True, fields=None, **kwargs):
+        assert many, "FastGameSerializer only serializes lists"
+        self.instance = instance
+        self.fields = fields
+
+    @staticmethod
+    def _related(sources, bgg_ids):
+        result = {}
+        for source in sources:
+            relation = _relation(source)
+            ids = defaultdict(list)
+            names = defaultdict(list)
+            rows = (
+                relation.through.objects.filter(
+                    **{f"{relation.source}_id__in": bgg_ids}
+                )
+                .order_by(*relation.ordering)
+                .values_list(
+                    f"{relation.source}_id",
+                    f"{relation.target}_id",
+                    f"{relation.target}__name",
+                )
+            )
+            for bgg_id, related_id, name in rows:
+                ids[bgg_id].append(related_id)
+                names[bgg_id].append(str(name))
+            result[source] = (ids, names)
+        return result
+
+    @cached_property
+    def data(self):
+        """Serialized games."""
+
+        rows = [
+            row if isinstance(row, dict) else row.__dict__
+            for row in (self.instance or ())
+        ]
+        if not rows:
+            return []
+
+        fields = _selected_fields(self.fields)
+        sources = {source for _, kind, source in fields if kind in ("ids", "names")}
+        related = self._related(sources, [row["bgg_id"] for row in rows])
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, kind, extra in fields:
+                if kind == "value":
+                    value = row[name]
+                    item[name] = None if value is None else extra(value)
+                elif kind == "list":
+                    value = row[name]
+                    item[name] = (
+                        None
+                        if value is None
+                        else [None if v is None else extra(v) for v in value]
+                    )
+                else:
+                    ids, names = related[extra]
+                    item[name] = list(
+                        (names if kind == "names" else ids).get(row["bgg_id"], ())
+                    )
+            data.append(item)
+        return data
+
+
+def stored_game_json(bgg_id):
+    """JSON of the given game as stored by the renderjson command, if any."""
+    # pylint: disable=no-member
+    return (
+        GameJson.objects.filter(game_id=bgg_id).values_list("data", flat=True).first()
+    )
+
+
+def serialize_games(bgg_ids, overlays=None, fields=None):
+    """Serialized games in the given order, unknown IDs are skipped.
+
+    Stored JSON is used where available, the remaining games are rendered with
+    FastGameSerializer. Overlays map IDs to values replacing those fields. If
+    fields are given, only those columns are loaded and rendered.
+    """
+
+    bgg_ids = list(bgg_ids)
+    # pylint: disable=no-member
+    stored = (
+        dict(
+            GameJson.objects.filter(game_id__in=bgg_ids).values_list("game_id", "data")
+        )
+        if fields is None
+        else {}
+    )
+    missing = [bgg_id for bgg_id in bgg_ids if bgg_id not in stored]
+    rendered = {}
+    if missing:
+        rows = Game.objects.filter(bgg_id__in=missing).values(
+            *game_value_fields(fields)
+        )
+        rendered = {
+            row["bgg_id"]: item
+            for row, item in zip(rows, FastGameSerializer(rows, fields=fields).data)
+        }
+
+    result = []
+    for bgg_id in bgg_ids:
+        data = stored.get(bgg_id)
+        item = json.loads(data) if data is not None else rendered.get(bgg_id)
+        if item is None:
+            continue
+        if overlays and bgg_id in overlays:
+            item.update(
+                (key, value)
+                for key, value in overlays[bgg_id].items()
+                if fields is None or key in item
+            )
+        result.append(item)
+    return result
+
+
 class RankingSerializer(ModelSerializer):
     """Ranking serializer."""
 
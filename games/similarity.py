@@ -0,0 +1,68 @@
+"""Precomputed most similar games, memory mapped from disk."""
+
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+
+LOGGER = logging.getLogger(__name__)
+
+BGG_ID_FILE = "bgg_id.npy"
+NEIGHBOURS_FILE = "neighbours.npy"
+SCORES_FILE = "scores.npy"
+
+
+class SimilarGames:
+    """Top similar games for every game, as written by the similargames command."""
+
+    def __init__(self, path):
+        path = Path(path)
+        self.bgg_id = np.load(path / BGG_ID_FILE, mmap_mode="r")
+        self.neighbours = np.load(path / NEIGHBOURS_FILE, mmap_mode="r")
+        self.scores = np.load(path / SCORES_FILE, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.bgg_id)
+
+    def _row(self, bgg_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self.bgg_id, bgg_id))
+        if row < len(self) and self.bgg_id[row] == bgg_id:
+            return row
+        return None
+
+    def similar(self, bgg_id: int) -> Optional[np.ndarray]:
+        """IDs of the most similar games in order, or None if the game is unknown."""
+        row = self._row(bgg_id)
+        if row is None:
+            return None
+        neighbours = np.asarray(self.neighbours[row])
+        return neighbours[neighbours >= 0]
+
+
+@lru_cache(maxsize=8)
+def _load_similar_games(path, mtime) -> Optional[SimilarGames]:
+    LOGGER.info("Loading similar games from <%s> (modified %s)", path, mtime)
+    try:
+        return SimilarGames(path)
+    except Exception:
+        LOGGER.exception("Unable to load similar games from <%s>", path)
+    return None
+
+
+def load_similar_games(path=None) -> Optional[SimilarGames]:
+    """Load the precomputed similar games if available.
+
+    Defaults to settings.SIMILAR_GAMES_PATH.
+    """
+    path = path or getattr(settings, "SIMILAR_GAMES_PATH", None)
+    if not path:
+        return None
+    try:
+        mtime = os.path.getmtime(os.path.join(path, NEIGHBOURS_FILE))
+    except OSError:
+        return None
+    return _load_similar_games(path, mtime)
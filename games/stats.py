@@ -0,0 +1,194 @@
+"""Games stats from in-memory taxonomy arrays and precomputed snapshots."""
+
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Category, GameType, Mechanic, Person
+from .serializers import (
+    CategorySerializer,
+    GameTypeSerializer,
+    MechanicSerializer,
+    PersonSerializer,
+)
+from .table import GameTable, game_table
+from .utils import model_updated_at, serialize_date
+
+LOGGER = logging.getLogger(__name__)
+
+STATS_SITES = {"rg_top": "rec_rank", "bgg_top": "bgg_rank"}
+
+# pylint: disable=no-member
+STATS_MODELS = {
+    "designer": (Person.objects.exclude(bgg_id=3), "designer_of", PersonSerializer),
+    "artist": (Person.objects.exclude(bgg_id=3), "artist_of", PersonSerializer),
+    "game_type": (GameType.objects.all(), "games", GameTypeSerializer),
+    "category": (Category.objects.all(), "games", CategorySerializer),
+    "mechanic": (Mechanic.objects.all(), "games", MechanicSerializer),
+}
+
+
+class TaxonomyTable:
+    """Links between games and the items of one taxonomy as NumPy arrays."""
+
+    def __init__(self, table: GameTable, queryset, field: str):
+        m2m_field = getattr(queryset.model, field).rel.field
+        game_column = f"{m2m_field.m2m_field_name()}_id"
+        item_column = f"{m2m_field.m2m_reverse_field_name()}_id"
+        links = np.array(
+            m2m_field.remote_field.through.objects.filter(
+                **{f"{item_column}__in": queryset.values("pk")}
+            ).values_list(game_column, item_column),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+
+        positions = np.searchsorted(table.bgg_id, links[:, 0])
+        known = positions < table.size
+        known[known] = table.bgg_id[positions[known]] == links[known, 0]
+        self.games = positions[known]
+        self.item_ids, self.items = np.unique(links[known, 1], return_inverse=True)
+
+    def top_items(
+        self, top_mask: np.ndarray, ranks: np.ndarray, count: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """IDs, number of top games and best rank of the items with most top games.
+
+        Same order as the SQL aggregation: most top games first, then best rank.
+        """
+
+        size = len(self.item_ids)
+        counts = np.bincount(
+            self.items, weights=top_mask[self.games], minlength=size
+        ).astype(np.int64)
+        best = np.full(size, np.nan)
+        np.fmin.at(best, self.items, ranks[self.games])
+
+        selected = np.flatnonzero(counts > 0)
+        order = np.lexsort(
+            (self.item_ids[selected], best[selected], -counts[selected])
+        )[:count]
+        selected = selected[order]
+        return self.item_ids[selected], counts[selected], best[selected]
+
+
+@lru_cache(maxsize=2)
+def _taxonomy_tables(updated_at) -> Dict[str, TaxonomyTable]:
+    LOGGER.info("Loading taxonomy tables for model version <%s>", updated_at)
+    table = game_table()
+    return {
+        key: TaxonomyTable(table, queryset, field)
+        for key, (queryset, field, _) in STATS_MODELS.items()
+    }
+
+
+def taxonomy_tables() -> Dict[str, TaxonomyTable]:
+    """Taxonomy links for the current model version."""
+    return _taxonomy_tables(model_updated_at())
+
+
+def games_stats(
+    mask: Optional[np.ndarray] = None,
+    top_games: int = 100,
+    top_items: int = 10,
+    context: Optional[dict] = None,
+) -> dict:
+    """Most common items among the top games of each site, restricted to the mask."""
+
+    table = game_table()
+    tables = taxonomy_tables()
+    mask = np.ones(table.size, dtype=bool) if mask is None else mask
+    result = {"updated_at": model_updated_at()}
+
+    for site_key, site_rank in STATS_SITES.items():
+        ranks = table.columns[site_rank]
+        top_mask = np.isin(table.bgg_id, table.top(mask, site_rank, top_games))
+        total = int(top_mask.sum())
+        site_result = {"total": total}
+        result[site_key] = site_result
+
+        for key, (queryset, _, serializer_class) in STATS_MODELS.items():
+            item_ids, counts, best = tables[key].top_items(top_mask, ranks, top_items)
+            item_ids = item_ids.tolist()
+            objs = queryset.in_bulk(item_ids)
+            objs = [objs[item_id] for item_id in item_ids]
+            serializer = serializer_class(objs, many=True, context=context or {})
+            for d, top, best_rank in zip(serializer.data, counts.tolist(), best):
+                d["count"] = top
+                d["pct"] = 100 * top / total if total else 0
+                d["best"] = (
+                    None
+                    if np.isnan(best_rank)
+                    else int(best_rank)
+                    if site_rank in table.integers
+                    else float(best_rank)
+                )
+            site_result[key] = serializer.data
+
+    return result
+
+
+def _variant_key(top_games: int, top_items: int) -> str:
+    return f"{top_games}:{top_items}"
+
+
+def write_stats_snapshot(
+    path=None, variants=None, context: Optional[dict] = None
+) -> int:
+    """Precompute the unfiltered stats for each (top_games, top_items) variant.
+
+    The snapshot is stamped with the current model update, return the number
+    of variants written.
+    """
+
+    path = path or settings.STATS_SNAPSHOT_PATH
+    variants = variants or settings.STATS_SNAPSHOT_VARIANTS
+    snapshot = {
+        "updated_at": serialize_date(model_updated_at()),
+        "variants": {
+            _variant_key(top_games, top_items): games_stats(
+                top_games=top_games, top_items=top_items, context=context
+            )
+            for top_games, top_items in variants
+        },
+    }
+
+    LOGGER.info("Writing %d stats variants to <%s>", len(variants), path)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(snapshot, file, cls=JSONEncoder, ensure_ascii=False)
+
+    _stats_snapshot.cache_clear()
+    return len(variants)
+
+
+@lru_cache(maxsize=2)
+def _stats_snapshot(path, updated_at) -> dict:
+    try:
+        with open(path, encoding="utf-8") as file:
+            snapshot = json.load(file)
+    except (OSError, ValueError):
+        LOGGER.info("No stats snapshot found in <%s>", path)
+        return {}
+
+    if snapshot.get("updated_at") != serialize_date(updated_at):
+        LOGGER.warning(
+            "Ignoring stats snapshot for model version <%s>, current is <%s>",
+            snapshot.get("updated_at"),
+            updated_at,
+        )
+        return {}
+
+    return snapshot.get("variants") or {}
+
+
+def stats_snapshot(top_games: int, top_items: int) -> Optional[dict]:
+    """Precomputed unfiltered stats for the current model version, if available."""
+    path = getattr(settings, "STATS_SNAPSHOT_PATH", None)
+    if not path:
+        return None
+    variants = _stats_snapshot(path, model_updated_at())
+    return variants.get(_variant_key(top_games, top_items))
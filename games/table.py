@@ -0,0 +1,158 @@
+"""In-memory columnar snapshot of the games' scalar fields."""
+
+import logging
+import operator
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from django.db.models import BooleanField, FloatField, QuerySet
+from django_filters.constants import EMPTY_VALUES
+
+from .models import Game
+from .utils import model_updated_at
+
+LOGGER = logging.getLogger(__name__)
+
+COLUMNS = (
+    "year",
+    "min_players",
+    "max_players",
+    "min_players_rec",
+    "max_players_rec",
+    "min_players_best",
+    "max_players_best",
+    "min_age",
+    "max_age",
+    "min_age_rec",
+    "max_age_rec",
+    "min_time",
+    "max_time",
+    "cooperative",
+    "compilation",
+    "bgg_rank",
+    "num_votes",
+    "avg_rating",
+    "bayes_rating",
+    "rec_rank",
+    "rec_rating",
+    "complexity",
+    "language_dependency",
+    "kennerspiel_score",
+    "available_on_bga",
+)
+
+COMPARISONS = {
+    "exact": operator.eq,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+class GameTable:
+    """Scalar game fields as NumPy arrays, ordered by BGG ID."""
+
+    def __init__(self, columns: Iterable[str] = COLUMNS):
+        columns = tuple(columns)
+        # pylint: disable=no-member
+        rows = tuple(Game.objects.order_by("bgg_id").values_list("bgg_id", *columns))
+        self.bgg_id = np.fromiter((row[0] for row in rows), dtype=np.int64)
+        self.size = len(self.bgg_id)
+        self.columns = {}
+        self.booleans = set()
+        self.integers = set()
+
+        for pos, column in enumerate(columns, start=1):
+            field = Game._meta.get_field(column)
+            if isinstance(field, BooleanField):
+                self.columns[column] = np.fromiter(
+                    (bool(row[pos]) for row in rows), dtype=bool, count=self.size
+                )
+                self.booleans.add(column)
+                continue
+            if not isinstance(field, FloatField):
+                self.integers.add(column)
+            self.columns[column] = np.array(
+                [np.nan if row[pos] is None else row[pos] for row in rows],
+                dtype=float,
+            )
+
+        LOGGER.info(
+            "Loaded %d columns for %d games into memory", len(self.columns), self.size
+        )
+
+    def column_mask(self, column: str, lookup: str, value) -> Optional[np.ndarray]:
+        """Mask for a single lookup, or None if it cannot be evaluated here."""
+
+        values = self.columns.get(column)
+        if values is None:
+            return None
+
+        if lookup == "isnull":
+            if column in self.booleans:
+                return np.full(self.size, not value)
+            return np.isnan(values) if value else ~np.isnan(values)
+
+        comparison = COMPARISONS.get(lookup)
+        if comparison is None:
+            return None
+
+        if column in self.booleans:
+            return comparison(values, bool(value))
+        # Same coercion the ORM applies to lookups on integer fields
+        value = int(value) if column in self.integers else float(value)
+        return comparison(values, value)
+
+    def mask(self, filters: Iterable[Tuple[str, str, object]]) -> Optional[np.ndarray]:
+        """Combined mask for (column, lookup, value) triples, or None if unsupported."""
+        result = np.ones(self.size, dtype=bool)
+        for column, lookup, value in filters:
+            column_mask = self.column_mask(column, lookup, value)
+            if column_mask is None:
+                return None
+            result &= column_mask
+        return result
+
+    def filterset_mask(self, filterset) -> Optional[np.ndarray]:
+        """Evaluate a bound FilterSet, or return None if SQL is needed."""
+
+        if not filterset.is_valid():
+            return None
+
+        filters = []
+        for name, value in filterset.form.cleaned_data.items():
+            if value in EMPTY_VALUES or (
+                isinstance(value, (list, tuple, QuerySet)) and not value
+            ):
+                continue
+            filter_ = filterset.filters[name]
+            if filter_.exclude or filter_.method is not None:
+                return None
+            filters.append((filter_.field_name, filter_.lookup_expr, value))
+
+        return self.mask(filters)
+
+    def ranked(self, column: str, rank: int) -> np.ndarray:
+        """IDs of the games ranked at or above the given rank in the column."""
+        return self.bgg_id[self.columns[column] <= rank]
+
+    def top(self, mask: np.ndarray, column: str, count: int) -> np.ndarray:
+        """IDs of the first games in the mask ordered by the given column."""
+        values = self.columns[column]
+        mask = mask & ~np.isnan(values)
+        positions = np.flatnonzero(mask)
+        order = np.argsort(values[positions], kind="stable")[:count]
+        return self.bgg_id[positions[order]]
+
+
+@lru_cache(maxsize=2)
+def _game_table(updated_at) -> GameTable:
+    LOGGER.info("Loading game table for model version <%s>", updated_at)
+    return GameTable()
+
+
+def game_table() -> GameTable:
+    """Columnar snapshot of the games for the current model version."""
+    return _game_table(model_updated_at())
@@ -0,0 +1,1577 @@
+""" tests """
+
+import base64
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F, Min, Q
+from django.db.utils import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from . import search
+from .caches import count_cache, response_cache, version_cache
+from .masks import _user_collection, game_masks
+from .models import (
+    Category,
+    Collection,
+    Game,
+    GameJson,
+    GameType,
+    Mechanic,
+    Person,
+    Ranking,
+    RankingDate,
+    RankingSeries,
+    User,
+)
+from .pagination import CachedCountPaginator
+from .renderers import FastJSONRenderer, orjson
+from .scoring import RankedGames
+from .search import TRIGRAM, UNICODE, _search_tokenizer, build_search_index
+from .serializers import (
+    FastGameSerializer,
+    GameSerializer,
+    game_field_names,
+    game_value_fields,
+)
+from .similarity import (
+    BGG_ID_FILE,
+    NEIGHBOURS_FILE,
+    SCORES_FILE,
+    load_similar_games,
+)
+from .stats import (
+    STATS_MODELS,
+    STATS_SITES,
+    _stats_snapshot,
+    _taxonomy_tables,
+    write_stats_snapshot,
+)
+from .table import _game_table
+from .timeseries import (
+    PLAIN,
+    RUN_LENGTH,
+    DateCollector,
+    SeriesCollector,
+    _catalogued_types,
+    _series_types,
+    decode,
+    make_series,
+    pack,
+    unpack,
+)
+from .utils import model_updated_at, serialize_date
+
+
+def _clear_caches():
+    count_cache().clear()
+    version_cache().clear()
+    response_cache().clear()
+    _game_table.cache_clear()
+    _user_collection.cache_clear()
+    game_masks.cache_clear()
+    _catalogued_types.cache_clear()
+    _series_types.cache_clear()
+    _stats_snapshot.cache_clear()
+    _taxonomy_tables.cache_clear()
+    _search_tokenizer.cache_clear()
+
+
+class QueryBudgetTest(TestCase):
+    """Fixed query budgets per endpoint, independent of the number of games."""
+
+    num_games = 6
+    # Games are rendered with one query per relation
+    relations = 11
+
+    @classmethod
+    def setUpTestData(cls):
+        designer = Person.objects.create(bgg_id=1, name="Designer")
+        artist = Person.objects.create(bgg_id=2, name="Artist")
+        game_type = GameType.objects.create(bgg_id=1, name="Strategy")
+        category = Category.objects.create(bgg_id=1, name="Economic")
+        mechanic = Mechanic.objects.create(bgg_id=1, name="Auction")
+
+        for bgg_id in range(1, cls.num_games + 1):
+            game = Game.objects.create(
+                bgg_id=bgg_id,
+                name=f"Game {bgg_id}",
+                year=2000 + bgg_id,
+                num_votes=100 * bgg_id,
+                rec_rating=float(bgg_id),
+            )
+            game.designer.add(designer)
+            game.artist.add(artist)
+            game.game_type.add(game_type)
+            game.category.add(category)
+            game.mechanic.add(mechanic)
+            for day in (1, 2):
+                Ranking.objects.create(
+                    game=game,
+                    ranking_type=Ranking.BGG,
+                    rank=cls.num_games + 1 - bgg_id,
+                    date=date(2020, 1, day),
+                )
+
+    def setUp(self):
+        _clear_caches()
+        recommender = FakeRecommender(["alice"], list(range(1, self.num_games + 1)))
+        patcher = mock.patch("games.views.load_recommender", return_value=recommender)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_game_detail(self):
+        """Single game."""
+        # stored JSON, game
+        with self.assertNumQueries(2 + self.relations):
+            response = self.client.get("/api/games/1/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_category_games(self):
+        """Games of a category."""
+        # category, count, games
+        with self.assertNumQueries(3 + self.relations):
+            response = self.client.get("/api/categories/1/games/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_person_games(self):
+        """Games of a person."""
+        # person, count, games
+        with self.assertNumQueries(3 + self.relations):
+            response = self.client.get("/api/persons/1/games/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_history(self):
+        """History of the top games."""
+        # catalogue and series types, last date, top games, stored JSON,
+        # games, rankings
+        with self.assertNumQueries(7 + self.relations):
+            response = self.client.get("/api/games/history/", {"top": self.num_games})
+        self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        """Game list served with FastGameSerializer."""
+        # count, page, stored JSON, games
+        with self.assertNumQueries(4 + self.relations):
+            response = self.client.get("/api/games/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_recommend(self):
+        """Recommendations for a user from the light recommender."""
+        # collection, compilations, game table, stored JSON, games
+        with self.assertNumQueries(5 + self.relations):
+            response = self.client.get("/api/games/recommend/", {"user": "alice"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_recommend_like(self):
+        """Recommendations for games similar to the liked ones."""
+        # compilations, game table, stored JSON, games
+        with self.assertNumQueries(4 + self.relations):
+            response = self.client.get("/api/games/recommend/", {"like": "1,2"})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SIMILAR_GAMES_PATH=None)
+    def test_similar(self):
+        """Similar games from the light recommender."""
+        # clusters, compilations, game table, stored JSON, games
+        with self.assertNumQueries(5 + self.relations):
+            response = self.client.get("/api/games/1/similar/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_rankings_games_fat(self):
+        """Rankings with full game details."""
+        # count, rankings with games
+        with self.assertNumQueries(2 + self.relations):
+            response = self.client.get("/api/rankings/games/", {"fat": "true"})
+        self.assertEqual(response.status_code, 200)
+
+
+class FastGameSerializerTest(TestCase):
+    """FastGameSerializer renders the same JSON as GameSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # names sort differently from IDs
+        zoe = Person.objects.create(bgg_id=1, name="Zoe")
+        adam = Person.objects.create(bgg_id=2, name="Adam")
+        category = Category.objects.create(bgg_id=1, name="Economic")
+
+        cls.base = Game.objects.create(
+            bgg_id=1,
+            name="Base",
+            alt_name=["Basis", "Base Game"],
+            year=1995,
+            url="https://example.com/base",
+            image_url=["https://example.com/base.jpg"],
+            luding_id=[123],
+            min_players=2,
+            min_age_rec=9.5,
+            cooperative=True,
+            num_votes=1000,
+            avg_rating=7.25,
+            bgg_rank=1,
+            rec_rating=1e-5,
+        )
+        cls.base.designer.add(zoe, adam)
+        cls.base.artist.add(adam)
+        cls.base.category.add(category)
+
+        cls.big_box = Game.objects.create(bgg_id=2, name="Big Box", compilation=True)
+        cls.big_box.compilation_of.add(cls.base)
+        cls.big_box.designer.add(adam)
+
+        cls.remake = Game.objects.create(bgg_id=3, name="Remake", description="")
+        cls.remake.implements.add(cls.base)
+        cls.remake.cluster.add(cls.base)
+
+    @staticmethod
+    def _render(data):
+        return JSONRenderer().render(data)
+
+    def test_values(self):
+        """Rows from values() render like model instances in GameSerializer."""
+        games = Game.objects.order_by("bgg_id")
+        expected = self._render(GameSerializer(games, many=True).data)
+        rows = games.values(*game_value_fields())
+        self.assertEqual(self._render(FastGameSerializer(rows).data), expected)
+
+    def test_instances(self):
+        """Model instances render the same, too."""
+        games = list(Game.objects.order_by("bgg_id"))
+        self.assertEqual(
+            self._render(FastGameSerializer(games).data),
+            self._render(GameSerializer(games, many=True).data),
+        )
+
+    def test_fields(self):
+        """Only the given fields are rendered, in the serializer's order."""
+        fields = ("designer_name", "name", "bgg_id", "contained_in")
+        games = Game.objects.order_by("bgg_id")
+        rows = games.values(*game_value_fields(fields))
+        data = FastGameSerializer(rows, fields=fields).data
+        full = GameSerializer(games, many=True).data
+        self.assertEqual(
+            data,
+            [{name: item[name] for name in item if name in fields} for item in full],
+        )
+        self.assertEqual(
+            list(data[0]), [name for name in game_field_names() if name in fields]
+        )
+
+
+class GameRetrieveTest(TestCase):
+    """Stored game JSON is only served for games matching the filters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        game = Game.objects.create(bgg_id=1, name="Game", year=2000)
+        GameJson.objects.create(game=game, data='{"bgg_id": 1, "stored": true}')
+
+    def setUp(self):
+        _clear_caches()
+
+    def test_stored_json(self):
+        """Stored JSON is served as is."""
+        response = self.client.get("/api/games/1/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["stored"])
+
+    def test_filtered(self):
+        """Filters apply before the stored JSON is served."""
+        response = self.client.get("/api/games/1/", {"year__lt": 3000})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["stored"])
+
+        response = self.client.get("/api/games/1/", {"year__gt": 3000})
+        self.assertEqual(response.status_code, 404)
+
+
+class GameFieldsTest(TestCase):
+    """The fields and omit parameters select the rendered game fields."""
+
+    @classmethod
+    def setUpTestData(cls):
+        designer = Person.objects.create(bgg_id=1, name="Designer")
+        for bgg_id in (1, 2):
+            game = Game.objects.create(bgg_id=bgg_id, name=f"Game {bgg_id}", year=2000)
+            game.designer.add(designer)
+        GameJson.objects.create(game_id=1, data='{"bgg_id": 1, "stored": true}')
+
+    def setUp(self):
+        _clear_caches()
+
+    def _get(self, path, params, status=200):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_list(self):
+        """Fields may be comma separated or repeated."""
+        for params in ({"fields": "name,bgg_id"}, {"fields": ["name", "bgg_id"]}):
+            data = self._get("/api/games/", {**params, "ordering": "bgg_id"})
+            self.assertEqual(
+                data["results"],
+                [{"bgg_id": 1, "name": "Game 1"}, {"bgg_id": 2, "name": "Game 2"}],
+            )
+
+    def test_omit(self):
+        """Omitted fields are dropped, also from the selected fields."""
+        data = self._get("/api/games/", {"omit": "description,designer_name"})
+        game = data["results"][0]
+        self.assertNotIn("description", game)
+        self.assertNotIn("designer_name", game)
+        self.assertIn("designer", game)
+        self.assertNotIn("stored", game)
+
+        data = self._get("/api/games/", {"fields": "bgg_id,name,year", "omit": "name"})
+        self.assertEqual(set(data["results"][0]), {"bgg_id", "year"})
+
+    def test_retrieve(self):
+        """Single games are rendered with the selected fields, too."""
+        data = self._get("/api/games/1/", {"fields": "bgg_id,designer_name"})
+        self.assertEqual(data, {"bgg_id": 1, "designer_name": ["Designer"]})
+        self._get("/api/games/3/", {"fields": "bgg_id"}, status=404)
+
+    def test_unknown(self):
+        """Unknown fields are rejected."""
+        for params in ({"fields": "bgg_id,nope"}, {"omit": "nope"}):
+            data = self._get("/api/games/", params, status=400)
+            self.assertIn("nope", data["fields"])
+            self._get("/api/games/1/", params, status=400)
+
+
+class FakeRecommender:
+    """Light recommender where every user prefers games with higher IDs."""
+
+    def __init__(self, users, game_ids):
+        self.known_users = frozenset(users)
+        self.users_indexes = {user: index for index, user in enumerate(users)}
+        self.items_labels = np.array(game_ids)
+        self.users_factors = np.ones((len(users), 1))
+        self.items_factors = np.array([game_ids], dtype=float)
+        self.users_linear_terms = np.zeros(len(users))
+        self.items_linear_terms = np.zeros(len(game_ids))
+        self.intercept = 0.0
+        self.known_games = frozenset(game_ids)
+        self.rated_games = frozenset(game_ids)
+
+    def similar_games(self, games):
+        """Games by distance of their IDs to the given games."""
+        games = np.array(list(games))
+        distances = np.abs(self.items_labels[:, None] - games[None, :]).min(axis=1)
+        order = np.argsort(distances, kind="stable")
+        return pd.DataFrame(index=pd.Index(self.items_labels[order]))
+
+
+class RankedGamesTest(TestCase):
+    """Candidates are ranked lazily, but always in the same order."""
+
+    def setUp(self):
+        self.scores = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 5.0, 3.0])
+        self.ranked = RankedGames(np.arange(101, 111), self.scores)
+        # descending scores, ties in order of the candidates
+        self.expected = [106, 108, 105, 109, 103, 101, 110, 107, 102, 104]
+
+    def test_slices(self):
+        """Slices are ranked and only sort as far as needed."""
+        self.assertEqual(len(self.ranked), 10)
+        top = self.ranked[:3]
+        self.assertEqual([game.bgg_id for game in top], self.expected[:3])
+        self.assertEqual([game.rank for game in top], [1, 2, 3])
+        self.assertEqual([game.score for game in top], [9.0, 6.0, 5.0])
+        self.assertEqual(len(self.ranked.top(3)), 3)
+        self.assertLess(len(self.ranked._order), len(self.ranked))
+
+        page = self.ranked[4:8]
+        self.assertEqual([game.bgg_id for game in page], self.expected[4:8])
+        self.assertEqual([game.rank for game in page], [5, 6, 7, 8])
+
+        self.assertEqual([game.bgg_id for game in self.ranked], self.expected)
+        self.assertEqual(self.ranked[20:30], [])
+
+    def test_items(self):
+        """Single items are ranked, out of range raises IndexError."""
+        self.assertEqual(self.ranked[0].bgg_id, 106)
+        self.assertEqual(self.ranked[-1].bgg_id, 104)
+        self.assertEqual(self.ranked[-1].rank, 10)
+        with self.assertRaises(IndexError):
+            self.ranked[10]  # pylint: disable=pointless-statement
+
+    def test_partial_sort(self):
+        """Partially sorted tops agree with a full stable sort."""
+        rng = np.random.default_rng(42)
+        scores = rng.integers(0, 20, 1_000).astype(float)
+        expected = np.argsort(-scores, kind="stable")
+        for count in (1, 10, 100, 499, 500, 1_000):
+            ranked = RankedGames(np.arange(1_000), scores)
+            self.assertEqual(ranked.top(count).tolist(), expected[:count].tolist())
+
+
+class RecommendTest(TestCase):
+    """Recommendations for a single user, ranked and paginated."""
+
+    num_games = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, cls.num_games + 1):
+            Game.objects.create(bgg_id=bgg_id, name=f"Game {bgg_id}")
+        cls.recommender = FakeRecommender(
+            ["alice", "bob"], list(range(1, cls.num_games + 1))
+        )
+
+    def setUp(self):
+        _clear_caches()
+        patcher = mock.patch(
+            "games.views.load_recommender", return_value=self.recommender
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _recommend(self, **params):
+        response = self.client.get("/api/games/recommend/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages(self):
+        """Pages continue the ranking of the candidates."""
+        data = self._recommend(user="alice")
+        self.assertEqual(data["count"], 30)
+        results = data["results"]
+        self.assertEqual([game["bgg_id"] for game in results], list(range(30, 5, -1)))
+        self.assertEqual([game["rec_rank"] for game in results], list(range(1, 26)))
+        self.assertEqual(results[0]["rec_rating"], 30.0)
+
+        data = self._recommend(user="alice", page=2)
+        self.assertEqual([game["bgg_id"] for game in data["results"]], [5, 4, 3, 2, 1])
+        self.assertEqual(
+            [game["rec_rank"] for game in data["results"]], [26, 27, 28, 29, 30]
+        )
+
+    def test_exclude(self):
+        """Excluded games are not ranked."""
+        data = self._recommend(user="alice", exclude="30,28")
+        self.assertEqual(data["count"], 28)
+        self.assertEqual([game["bgg_id"] for game in data["results"][:3]], [29, 27, 26])
+        self.assertEqual([game["rec_rank"] for game in data["results"][:3]], [1, 2, 3])
+
+    def _export(self, export_format, **params):
+        response = self.client.get(
+            "/api/games/recommend/",
+            {"user": "alice", "export": export_format, **params},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            f'filename="recommendations.{export_format}"',
+            response["Content-Disposition"],
+        )
+        return response, b"".join(response.streaming_content).decode("utf-8")
+
+    @mock.patch("games.views.EXPORT_CHUNK_SIZE", 7)
+    def test_export_csv(self):
+        """The CSV export has all games in order, across pages and chunks."""
+        response, content = self._export("csv")
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([int(row["bgg_id"]) for row in rows], list(range(30, 0, -1)))
+        self.assertEqual([int(row["rec_rank"]) for row in rows], list(range(1, 31)))
+
+        _, content = self._export("csv", fields="bgg_id,rec_rank")
+        self.assertEqual(content.splitlines()[:2], ["bgg_id,rec_rank", "30,1"])
+
+    def test_export_jsonl(self):
+        """The JSON lines export has one game per line."""
+        response, content = self._export("jsonl", fields="bgg_id,rec_rating")
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0], {"bgg_id": 30, "rec_rating": 30.0})
+        self.assertEqual(rows[-1], {"bgg_id": 1, "rec_rating": 1.0})
+
+    def test_export_invalid(self):
+        """Unknown export formats are rejected."""
+        response = self.client.get(
+            "/api/games/recommend/", {"user": "alice", "export": "xml"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class GroupRecommendTest(TestCase):
+    """Group recommendations aggregate the users' scores."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, 7):
+            Game.objects.create(bgg_id=bgg_id, name=f"Game {bgg_id}")
+        alice = User.objects.create(name="alice")
+        bob = User.objects.create(name="bob")
+        for bgg_id in (1, 2, 3):
+            Collection.objects.create(game_id=bgg_id, user=alice, rating=7)
+        Collection.objects.create(game_id=1, user=bob, rating=7)
+
+        # alice scores game g with g, bob with 10 - g, carol with g / 2 + 2
+        cls.recommender = FakeRecommender(["alice", "bob", "carol"], list(range(1, 7)))
+        cls.recommender.users_factors = np.array([[1.0], [-1.0], [0.5]])
+        cls.recommender.users_linear_terms = np.array([0.0, 10.0, 2.0])
+
+    def setUp(self):
+        _clear_caches()
+        patcher = mock.patch(
+            "games.views.load_recommender", return_value=self.recommender
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _assert_scores(self, aggregation, expected, order):
+        response = self.client.get(
+            "/api/games/recommend/",
+            {"user": "alice,bob,carol", "aggregation": aggregation},
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([game["bgg_id"] for game in results], order)
+        for game in results:
+            self.assertAlmostEqual(
+                game["rec_rating"], expected[game["bgg_id"]], msg=game["bgg_id"]
+            )
+
+    def test_mean(self):
+        """Mean of all scores, also the default."""
+        expected = {g: (g + 10 - g + g / 2 + 2) / 3 for g in range(1, 7)}
+        self._assert_scores("mean", expected, [6, 5, 4, 3, 2, 1])
+        self._assert_scores("", expected, [6, 5, 4, 3, 2, 1])
+
+    def test_least_misery(self):
+        """Lowest score of any user, ties in order of the games."""
+        expected = {1: 1, 2: 2, 3: 3, 4: 4, 5: 4.5, 6: 4}
+        self._assert_scores("min", expected, [5, 4, 6, 3, 2, 1])
+        self._assert_scores("least_misery", expected, [5, 4, 6, 3, 2, 1])
+
+    def test_median(self):
+        """Median of the users' scores."""
+        expected = {1: 2.5, 2: 3, 3: 3.5, 4: 4, 5: 5, 6: 5}
+        self._assert_scores("median", expected, [5, 6, 4, 3, 2, 1])
+
+    def test_weighted(self):
+        """Mean weighted by the number of games each user rated."""
+        expected = {g: (3 * g + (10 - g)) / 4 for g in range(1, 7)}
+        self._assert_scores("weighted", expected, [6, 5, 4, 3, 2, 1])
+
+    def test_invalid(self):
+        """Unknown aggregations are rejected."""
+        response = self.client.get(
+            "/api/games/recommend/", {"user": "alice,bob", "aggregation": "max"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("aggregation", response.json())
+
+
+class RecommendBatchTest(TestCase):
+    """Batch recommendations honour filters from the query and the body."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, 7):
+            Game.objects.create(
+                bgg_id=bgg_id, name=f"Game {bgg_id}", year=2000 + bgg_id
+            )
+        cls.recommender = FakeRecommender(["alice", "bob"], list(range(1, 7)))
+
+    def setUp(self):
+        _clear_caches()
+        patcher = mock.patch(
+            "games.views.load_recommender", return_value=self.recommender
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _recommend(self, data, params=""):
+        response = self.client.post(
+            f"/api/games/recommend_batch/{params}",
+            data,
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            result["user"]: result["bgg_id"] for result in response.json()["results"]
+        }
+
+    def test_unfiltered(self):
+        """All games are candidates without filters."""
+        results = self._recommend({"user": ["alice", "bob"], "num_games": 3})
+        self.assertEqual(results, {"alice": [6, 5, 4], "bob": [6, 5, 4]})
+
+    def test_query_filters(self):
+        """Filters in the query string apply."""
+        results = self._recommend({"user": ["alice"]}, "?year__lte=2003")
+        self.assertEqual(results, {"alice": [3, 2, 1]})
+
+    def test_body_filters(self):
+        """Filters in the body apply, combined with those in the query."""
+        results = self._recommend({"user": ["alice"], "year__lte": 2003})
+        self.assertEqual(results, {"alice": [3, 2, 1]})
+
+        results = self._recommend(
+            {"user": ["alice"], "year__lte": 2003}, "?year__gte=2002"
+        )
+        self.assertEqual(results, {"alice": [3, 2]})
+
+    def test_unknown_users(self):
+        """Unknown users get empty recommendations."""
+        results = self._recommend({"user": ["alice", "carol"], "num_games": 2})
+        self.assertEqual(results, {"alice": [6, 5], "carol": []})
+
+    def test_stream(self):
+        """With stream=true, results are sent as JSON lines."""
+        response = self.client.post(
+            "/api/games/recommend_batch/",
+            {"user": ["alice", "bob"], "num_games": 2, "stream": True},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                {"user": "alice", "bgg_id": [6, 5], "score": [6.0, 5.0]},
+                {"user": "bob", "bgg_id": [6, 5], "score": [6.0, 5.0]},
+            ],
+        )
+
+    @override_settings(MAX_BATCH_USERS=2)
+    def test_max_users(self):
+        """Requests with too many users are rejected."""
+        response = self.client.post(
+            "/api/games/recommend_batch/",
+            {"user": ["alice", "bob", "carol"]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ResponseCacheTest(TestCase):
+    """Recommendations are served from the cache until the data changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, 7):
+            Game.objects.create(bgg_id=bgg_id, name=f"Game {bgg_id}")
+        cls.recommender = FakeRecommender(["alice"], list(range(1, 7)))
+
+    def setUp(self):
+        _clear_caches()
+        response_cache().counters.clear()
+        patcher = mock.patch(
+            "games.views.load_recommender", return_value=self.recommender
+        )
+        self.load_recommender = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _recommend(self):
+        response = self.client.get("/api/games/recommend/", {"user": "alice"})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit(self):
+        """The second request is a hit and renders the same response."""
+        first = self._recommend()
+        second = self._recommend()
+        self.assertEqual(self.load_recommender.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+        info = response_cache().info()
+        self.assertEqual(info["recommend_misses"], 1)
+        self.assertEqual(info["recommend_hits"], 1)
+
+    def test_invalidation(self):
+        """A new data version drops the cached responses."""
+        self._recommend()
+        version_cache().clear()
+        with mock.patch(
+            "games.caches.model_updated_at",
+            return_value=datetime(2030, 1, 1, tzinfo=timezone.utc),
+        ):
+            self._recommend()
+        self.assertEqual(self.load_recommender.call_count, 2)
+        info = response_cache().info()
+        self.assertEqual(info["recommend_misses"], 2)
+        self.assertEqual(info["invalidations"], 1)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled(self):
+        """Nothing is cached if the cache is disabled."""
+        self._recommend()
+        self._recommend()
+        self.assertEqual(self.load_recommender.call_count, 2)
+        self.assertEqual(len(response_cache()), 0)
+
+    def test_cache_stats(self):
+        """The stats endpoint reports both caches."""
+        self._recommend()
+        response = self.client.get("/api/games/cache_stats/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["entries"], 1)
+        self.assertGreater(data["bytes"], 0)
+        self.assertEqual(data["recommend_misses"], 1)
+        self.assertIn("entries", data["counts"])
+
+
+class UserStatsTest(TestCase):
+    """User stats count the top games the user owns, played and rated."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, 7):
+            Game.objects.create(
+                bgg_id=bgg_id,
+                name=f"Game {bgg_id}",
+                rec_rank=bgg_id,
+                bgg_rank=7 - bgg_id,
+            )
+        cls.user = User.objects.create(name="Alice")
+        Collection.objects.create(game_id=1, user=cls.user, owned=True, rating=8)
+        Collection.objects.create(game_id=2, user=cls.user, play_count=3)
+        Collection.objects.create(game_id=6, user=cls.user, owned=True)
+
+    def setUp(self):
+        _clear_caches()
+
+    def _stats(self):
+        response = self.client.get("/api/users/alice/stats/", {"top_games": 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data["rg_top"], data["bgg_top"]
+
+    def test_stats(self):
+        """Games are counted per site."""
+        rg_top, bgg_top = self._stats()
+        self.assertEqual(rg_top, {"total": 3, "owned": 1, "played": 1, "rated": 1})
+        self.assertEqual(bgg_top, {"total": 3, "owned": 1, "played": 0, "rated": 0})
+
+    def test_new_version(self):
+        """Collections are reloaded with a new data version."""
+        self._stats()
+        Collection.objects.create(game_id=3, user=self.user, rating=7)
+        rg_top, _ = self._stats()
+        self.assertEqual(rg_top["rated"], 1)
+
+        version_cache().clear()
+        with mock.patch(
+            "games.caches.model_updated_at",
+            return_value=datetime(2030, 1, 1, tzinfo=timezone.utc),
+        ):
+            rg_top, _ = self._stats()
+        self.assertEqual(rg_top["rated"], 2)
+
+
+class SimilarGamesTest(TestCase):
+    """Precomputed similar games are loaded from the configured path."""
+
+    def test_settings(self):
+        """The path is read from the settings on every call."""
+        with tempfile.TemporaryDirectory() as path:
+            np.save(os.path.join(path, BGG_ID_FILE), np.array([1, 2, 3]))
+            np.save(
+                os.path.join(path, NEIGHBOURS_FILE),
+                np.array([[2, 3], [3, -1], [1, 2]]),
+            )
+            np.save(os.path.join(path, SCORES_FILE), np.ones((3, 2)))
+
+            with override_settings(SIMILAR_GAMES_PATH=None):
+                self.assertIsNone(load_similar_games())
+
+            with override_settings(SIMILAR_GAMES_PATH=path):
+                similar_games = load_similar_games()
+                self.assertEqual(len(similar_games), 3)
+                self.assertEqual(similar_games.similar(2).tolist(), [3])
+                self.assertIsNone(similar_games.similar(4))
+
+
+@override_settings(READ_ONLY=True)
+class ConditionalGetTest(TestCase):
+    """Conditional requests are answered from the data version."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Game.objects.create(bgg_id=1, name="Game", year=2000)
+
+    def setUp(self):
+        _clear_caches()
+        patcher = mock.patch(
+            "games.caches.model_updated_at",
+            return_value=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # ignore the data files in the working directory
+        patcher = mock.patch("games.caches._mtime", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_modified(self):
+        """A matching ETag or a recent date gets 304 without a body."""
+        response = self.client.get("/api/games/1/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn("max-age", response["Cache-Control"])
+
+        response = self.client.get("/api/games/1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+        self.assertEqual(response["Last-Modified"], "Wed, 01 Jan 2020 00:00:00 GMT")
+        response = self.client.get(
+            "/api/games/1/", HTTP_IF_MODIFIED_SINCE="Wed, 01 Jan 2020 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified(self):
+        """Other requests and a new data version get a fresh response."""
+        response = self.client.get("/api/games/1/")
+        etag = response["ETag"]
+
+        response = self.client.get(
+            "/api/games/1/", {"year__lt": 3000}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        version_cache().clear()
+        with mock.patch(
+            "games.caches.model_updated_at",
+            return_value=datetime(2030, 1, 1, tzinfo=timezone.utc),
+        ):
+            response = self.client.get("/api/games/1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(READ_ONLY=False)
+    def test_writable(self):
+        """Without READ_ONLY, writes could change the data, so no validators."""
+        response = self.client.get("/api/games/1/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+
+class CachedCountPaginatorTest(TestCase):
+    """Counts are cached per queryset and data version."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, 11):
+            Game.objects.create(
+                bgg_id=bgg_id, name=f"Game {bgg_id}", year=2000 + bgg_id
+            )
+
+    def setUp(self):
+        _clear_caches()
+
+    @staticmethod
+    def _count(queryset):
+        return CachedCountPaginator(queryset.order_by("bgg_id"), 3).count
+
+    def test_cached(self):
+        """Repeated counts don't query, other filters are counted separately."""
+        with self.assertNumQueries(1):
+            self.assertEqual(self._count(Game.objects.all()), 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._count(Game.objects.all()), 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._count(Game.objects.filter(year__gt=2005)), 5)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._count(Game.objects.filter(year__gt=2007)), 3)
+        self.assertEqual(len(count_cache()), 3)
+
+    def test_new_version(self):
+        """A new data version drops the cached counts."""
+        self._count(Game.objects.all())
+        version_cache().clear()
+        with mock.patch(
+            "games.caches.model_updated_at",
+            return_value=datetime(2030, 1, 1, tzinfo=timezone.utc),
+        ), self.assertNumQueries(1):
+            self.assertEqual(self._count(Game.objects.all()), 10)
+
+    @override_settings(COUNT_CACHE_ENABLED=False)
+    def test_disabled(self):
+        """Without the cache, every count queries."""
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(self._count(Game.objects.all()), 10)
+        self.assertEqual(len(count_cache()), 0)
+
+    def test_lists(self):
+        """Plain lists are counted without the cache."""
+        self.assertEqual(CachedCountPaginator(list(range(7)), 3).count, 7)
+        self.assertEqual(len(count_cache()), 0)
+
+    def test_endpoint(self):
+        """Repeated list requests reuse the count."""
+        params = {"year__gt": 2005, "fields": "bgg_id"}
+        # count, page, games
+        with self.assertNumQueries(3):
+            first = self.client.get("/api/games/", params).json()
+        with self.assertNumQueries(2):
+            second = self.client.get("/api/games/", params).json()
+        self.assertEqual(first, second)
+        self.assertEqual(second["count"], 5)
+
+
+class GamesStatsTest(TestCase):
+    """Games stats match the SQL aggregation they replaced."""
+
+    @classmethod
+    def setUpTestData(cls):
+        people = [Person.objects.create(bgg_id=i, name=f"P{i}") for i in range(1, 7)]
+        types = [GameType.objects.create(bgg_id=i, name=f"T{i}") for i in (1, 2)]
+        categories = [
+            Category.objects.create(bgg_id=i, name=f"C{i}") for i in (1, 2, 3)
+        ]
+        mechanics = [Mechanic.objects.create(bgg_id=i, name=f"M{i}") for i in (1, 2)]
+
+        for bgg_id in range(1, 21):
+            game = Game.objects.create(
+                bgg_id=bgg_id,
+                name=f"Game {bgg_id}",
+                year=2000 + bgg_id % 5,
+                rec_rank=bgg_id if bgg_id % 6 else None,
+                bgg_rank=21 - bgg_id if bgg_id % 4 else None,
+            )
+            game.designer.add(people[bgg_id % 6], people[bgg_id % 4])
+            game.artist.add(people[bgg_id % 5])
+            game.game_type.add(types[bgg_id % 2])
+            game.category.add(*categories[: bgg_id % 3 + 1])
+            if bgg_id % 7:
+                game.mechanic.add(mechanics[bgg_id % 7 % 2])
+
+    def setUp(self):
+        _clear_caches()
+
+    @staticmethod
+    def _sql_stats(games, top_games, top_items):
+        """The SQL aggregation the stats used to be computed with."""
+
+        result = {}
+        for site_key, site_rank in STATS_SITES.items():
+            top = frozenset(
+                games.filter(**{f"{site_rank}__isnull": False})
+                .order_by(site_rank, "bgg_id")
+                .values_list("bgg_id", flat=True)[:top_games]
+            )
+            total = len(top)
+            site_result = {"total": total}
+            result[site_key] = site_result
+
+            for key, (queryset, field, serializer_class) in STATS_MODELS.items():
+                # pylint: disable=no-member
+                objs = (
+                    queryset.annotate(
+                        top=Count(field, filter=Q(**{f"{field}__in": top})),
+                        best=Min(f"{field}__{site_rank}"),
+                    )
+                    .filter(top__gt=0)
+                    .order_by("-top", "best", "pk")[:top_items]
+                )
+                data = serializer_class(objs, many=True).data
+                for d, obj in zip(data, objs):
+                    d["count"] = obj.top
+                    d["pct"] = 100 * obj.top / total if total else 0
+                    d["best"] = obj.best
+                site_result[key] = data
+        return json.loads(JSONRenderer().render(result))
+
+    def _stats(self, **params):
+        response = self.client.get("/api/games/stats/", params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        del data["updated_at"]
+        return data
+
+    def test_unfiltered(self):
+        """All games, with different numbers of top games and items."""
+        for top_games, top_items in ((100, 10), (5, 2), (8, 3)):
+            self.assertEqual(
+                self._stats(top_games=top_games, top_items=top_items),
+                self._sql_stats(Game.objects.all(), top_games, top_items),
+            )
+
+    def test_filtered(self):
+        """Only the games matching the filters."""
+        self.assertEqual(
+            self._stats(year__gte=2002, top_games=6, top_items=3),
+            self._sql_stats(Game.objects.filter(year__gte=2002), 6, 3),
+        )
+        self.assertEqual(
+            self._stats(year=2001),
+            self._sql_stats(Game.objects.filter(year=2001), 100, 10),
+        )
+        self.assertEqual(
+            self._stats(year=1900),
+            self._sql_stats(Game.objects.none(), 100, 10),
+        )
+
+    def test_snapshot(self):
+        """Unfiltered stats are served from a snapshot of the same model version."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "stats.json")
+            with override_settings(STATS_SNAPSHOT_PATH=path):
+                self.assertEqual(write_stats_snapshot(variants=((5, 2),)), 1)
+                with open(path, encoding="utf-8") as file:
+                    snapshot = json.load(file)["variants"]["5:2"]
+                snapshot["rg_top"]["total"] = -1
+                updated_at = serialize_date(model_updated_at())
+                self._write_snapshot(path, updated_at, snapshot)
+
+                stats = self._stats(top_games=5, top_items=2)
+                self.assertEqual(stats["rg_top"]["total"], -1)
+                self.assertEqual(
+                    self._stats(top_games=5, top_items=3),
+                    self._sql_stats(Game.objects.all(), 5, 3),
+                )
+                self.assertEqual(
+                    self._stats(top_games=5, top_items=2, year__gte=2002),
+                    self._sql_stats(Game.objects.filter(year__gte=2002), 5, 2),
+                )
+
+                self._write_snapshot(path, "2000-01-01T00:00:00Z", snapshot)
+                self.assertEqual(
+                    self._stats(top_games=5, top_items=2),
+                    self._sql_stats(Game.objects.all(), 5, 2),
+                )
+
+    @staticmethod
+    def _write_snapshot(path, updated_at, variant):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"updated_at": updated_at, "variants": {"5:2": variant}}, file)
+        _clear_caches()
+
+
+class HistoryTest(TestCase):
+    """Ranking history per game, as lists or columns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in (1, 2, 3):
+            Game.objects.create(bgg_id=bgg_id, name=f"Game {bgg_id}")
+        ranks = {
+            date(2020, 1, 1): {1: 1, 2: 2, 3: 3},
+            date(2020, 1, 8): {1: 2, 2: 1},
+            date(2020, 1, 15): {1: 3, 2: 1, 3: 2},
+        }
+        for day, day_ranks in ranks.items():
+            for bgg_id, rank in day_ranks.items():
+                Ranking.objects.create(
+                    game_id=bgg_id, ranking_type=Ranking.BGG, rank=rank, date=day
+                )
+        Ranking.objects.create(
+            game_id=1, ranking_type=Ranking.FACTOR, rank=1, date=date(2020, 1, 15)
+        )
+
+    def setUp(self):
+        _clear_caches()
+
+    def _history(self, **params):
+        response = self.client.get(
+            "/api/games/history/", {"top": 3, "fields": "bgg_id", **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rows(self):
+        """Games in order of the last ranking, each with all its rankings."""
+        data = self._history()
+        self.assertEqual([item["game"]["bgg_id"] for item in data], [2, 3, 1])
+        self.assertEqual(
+            data[1]["rankings"],
+            [
+                {"ranking_type": "bgg", "rank": 3, "date": "2020-01-01", "game": 3},
+                {"ranking_type": "bgg", "rank": 2, "date": "2020-01-15", "game": 3},
+            ],
+        )
+
+    def test_columnar(self):
+        """One date axis, missing ranks are null."""
+        data = self._history(columnar="true")
+        self.assertEqual(data["ranking_type"], "bgg")
+        self.assertEqual(data["dates"], ["2020-01-01", "2020-01-08", "2020-01-15"])
+        self.assertEqual(data["games"], [{"bgg_id": 2}, {"bgg_id": 3}, {"bgg_id": 1}])
+        self.assertEqual(data["ranks"], [[2, 1, 1], [3, None, 2], [1, 2, 3]])
+
+    def test_same_data(self):
+        """Both shapes hold the same rankings, also with date filters."""
+        for params in ({}, {"date__gte": "2020-01-08"}, {"date__lte": "2020-01-08"}):
+            rows = self._history(top=2, **params)
+            columns = self._history(top=2, columnar="true", **params)
+            self.assertEqual([item["game"] for item in rows], columns["games"], params)
+            from_rows = {
+                (ranking["game"], ranking["date"], ranking["rank"])
+                for item in rows
+                for ranking in item["rankings"]
+            }
+            from_columns = {
+                (game["bgg_id"], day, rank)
+                for game, ranks in zip(columns["games"], columns["ranks"])
+                for day, rank in zip(columns["dates"], ranks)
+                if rank is not None
+            }
+            self.assertEqual(from_rows, from_columns, params)
+
+
+class PackTest(TestCase):
+    """Packed series unpack to the original values."""
+
+    def test_round_trip(self):
+        """Values survive packing, with and without deltas."""
+        rng = np.random.default_rng(42)
+        for values in (
+            [],
+            [5],
+            [1, 1, 1, 1, 2, 2, 2, 7],
+            [3, 1, 4, 1, 5, 9, 2, 6],
+            [-3, 0, 2**31 - 1],
+            rng.integers(1, 5_000, 1_000).tolist(),
+        ):
+            for delta in (False, True):
+                unpacked = unpack(pack(values, delta=delta), delta=delta)
+                self.assertEqual(unpacked.tolist(), values, (values, delta))
+
+    def test_formats(self):
+        """Runs are run-length encoded, noise stored plain."""
+        self.assertEqual(pack([]), b"")
+        self.assertEqual(pack([2] * 100)[:1], RUN_LENGTH)
+        self.assertEqual(len(pack([2] * 100)), 9)
+        self.assertEqual(pack([3, 1, 4, 1, 5])[:1], PLAIN)
+        # weekly dates are a constant difference
+        weekly = list(range(737_000, 737_700, 7))
+        self.assertEqual(len(pack(weekly, delta=True)), 17)
+
+    def test_series(self):
+        """Series are sorted by date and summarise the rankings."""
+        ordinals = [date(2020, 1, day).toordinal() for day in (15, 1, 8, 22)]
+        series = make_series(1, Ranking.BGG, ordinals, [3, 2, 1, 1])
+        self.assertEqual(series.count, 4)
+        self.assertEqual(series.first_date, date(2020, 1, 1))
+        self.assertEqual(series.last_date, date(2020, 1, 22))
+        self.assertEqual(series.best_rank, 1)
+        self.assertEqual(series.best_date, date(2020, 1, 22))
+        dates, ranks = decode(series)
+        self.assertEqual(dates.tolist(), sorted(ordinals))
+        self.assertEqual(ranks.tolist(), [2, 1, 3, 1])
+
+
+class FillRankingDbTest(TestCase):
+    """The fillrankingdb command writes rows, series and catalogue per type."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in (1, 2, 3):
+            Game.objects.create(bgg_id=bgg_id, name=f"Game {bgg_id}")
+
+    def setUp(self):
+        _clear_caches()
+        tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = tmp_dir.name
+        # BGG rankings keep each game's last ranking of the week (ending Sunday)
+        self._write("bgg", "2020-01-01", "bgg_id,rank\n1,2\n2,1\n3,3\n")
+        self._write("bgg", "2020-01-03", "bgg_id,rank\n1,1\n2,2\n")
+        self._write("bgg", "2020-01-08", "bgg_id,rank\n1,1\n2,3\n3,2\n4,4\n")
+        # factor rankings average the scores of the week
+        self._write("factor", "2020-01-01", "bgg_id,rank,score\n1,1,9\n2,2,1\n")
+        self._write("factor", "2020-01-02", "bgg_id,rank,score\n1,2,1\n2,1,5\n")
+
+    def _write(self, sub_dir, name, content):
+        os.makedirs(os.path.join(self.path, sub_dir), exist_ok=True)
+        with open(
+            os.path.join(self.path, sub_dir, f"{name}.csv"), "w", encoding="utf-8"
+        ) as file:
+            file.write(content)
+
+    def _fill(self, *args):
+        call_command("fillrankingdb", self.path, *args, verbosity=0)
+
+    @staticmethod
+    def _rows(ranking_type):
+        return sorted(
+            Ranking.objects.filter(ranking_type=ranking_type).values_list(
+                "game_id", "date", "rank"
+            )
+        )
+
+    @staticmethod
+    def _series_rows(ranking_type):
+        return sorted(
+            (series.game_id, date.fromordinal(ordinal), rank)
+            for series in RankingSeries.objects.filter(ranking_type=ranking_type)
+            for ordinal, rank in zip(*(values.tolist() for values in decode(series)))
+        )
+
+    def test_both(self):
+        """Rows, series and catalogue hold the same rankings."""
+        self._fill("--types", Ranking.BGG, Ranking.FACTOR)
+
+        first, second = date(2020, 1, 5), date(2020, 1, 12)
+        expected = [
+            (1, first, 1),
+            (1, second, 1),
+            (2, first, 2),
+            (2, second, 3),
+            (3, first, 3),
+            (3, second, 2),
+        ]
+        self.assertEqual(self._rows(Ranking.BGG), expected)
+        self.assertEqual(self._series_rows(Ranking.BGG), expected)
+        self.assertEqual(self._rows(Ranking.FACTOR), [(1, first, 1), (2, first, 2)])
+        self.assertEqual(self._series_rows(Ranking.FACTOR), self._rows(Ranking.FACTOR))
+        self.assertEqual(
+            list(
+                RankingDate.objects.order_by("ranking_type", "date").values_list(
+                    "ranking_type", "date", "count", "min_rank", "max_rank"
+                )
+            ),
+            [
+                (Ranking.BGG, first, 3, 1, 3),
+                (Ranking.BGG, second, 3, 1, 3),
+                (Ranking.FACTOR, first, 2, 1, 2),
+            ],
+        )
+
+    def test_replace(self):
+        """Filling a type again replaces it and leaves other types alone."""
+        self._fill("--types", Ranking.BGG, Ranking.FACTOR)
+        factor = self._rows(Ranking.FACTOR)
+        self._write("bgg", "2020-01-15", "bgg_id,rank\n3,1\n")
+        self._fill("--types", Ranking.BGG)
+
+        self.assertEqual(self._rows(Ranking.BGG), self._series_rows(Ranking.BGG))
+        self.assertEqual(len(self._rows(Ranking.BGG)), 7)
+        self.assertEqual(self._rows(Ranking.FACTOR), factor)
+        self.assertEqual(self._series_rows(Ranking.FACTOR), factor)
+        self.assertEqual(
+            RankingDate.objects.filter(ranking_type=Ranking.BGG).count(), 3
+        )
+
+    def test_storage(self):
+        """Series or rows only, and nothing on a dry run."""
+        self._fill("--types", Ranking.BGG, "--storage", "series")
+        self.assertFalse(Ranking.objects.exists())
+        self.assertFalse(RankingDate.objects.exists())
+        self.assertEqual(len(self._series_rows(Ranking.BGG)), 6)
+
+        self._fill("--types", Ranking.BGG, "--storage", "rows")
+        self.assertEqual(self._rows(Ranking.BGG), self._series_rows(Ranking.BGG))
+
+        self._write("bgg", "2020-01-15", "bgg_id,rank\n3,1\n")
+        with mock.patch("builtins.print"):
+            self._fill("--types", Ranking.BGG, "--dry-run")
+        self.assertEqual(len(self._rows(Ranking.BGG)), 6)
+
+
+class RankingCatalogueTest(TestCase):
+    """Series and catalogue serve the same data as the ranking rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, 6):
+            Game.objects.create(bgg_id=bgg_id, name=f"Game {bgg_id}")
+
+        series = SeriesCollector()
+        dates = DateCollector()
+        for week in range(6):
+            day = date(2020, 1, 5) + timedelta(weeks=week)
+            for bgg_id in range(1, 6):
+                for ranking_type, rank in (
+                    (Ranking.BGG, (bgg_id + week) % 5 + 1),
+                    (Ranking.FACTOR, bgg_id if week % 2 or bgg_id < 4 else None),
+                ):
+                    if rank is None:
+                        continue
+                    ranking = Ranking.objects.create(
+                        game_id=bgg_id, ranking_type=ranking_type, rank=rank, date=day
+                    )
+                    series.add(ranking)
+                    dates.add(ranking)
+        RankingSeries.objects.bulk_create(series.series())
+        RankingDate.objects.bulk_create(dates.dates())
+
+    def setUp(self):
+        _clear_caches()
+
+    def _get(self, path, params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _assert_same(self, path, params_list):
+        """Same responses from series and catalogue as from the rows."""
+        with CaptureQueriesContext(connection) as context:
+            results = [self._get(path, params) for params in params_list]
+        for query in context.captured_queries:
+            self.assertNotIn('"games_ranking"', query["sql"])
+
+        RankingSeries.objects.all().delete()
+        RankingDate.objects.all().delete()
+        _clear_caches()
+        for params, expected in zip(params_list, results):
+            self.assertEqual(self._get(path, params), expected, params)
+
+    def test_dates(self):
+        """Ranking dates, with and without details."""
+        with self.assertNumQueries(2):
+            data = self._get("/api/rankings/dates/", {"details": "true"})
+        self.assertEqual(len(data), 12)
+        self.assertEqual(
+            data[6],
+            {
+                "ranking_type": Ranking.FACTOR,
+                "date": "2020-01-05",
+                "count": 3,
+                "min_rank": 1,
+                "max_rank": 3,
+            },
+        )
+        self._assert_same(
+            "/api/rankings/dates/",
+            [
+                {},
+                {"details": "true"},
+                {"ranking_type": Ranking.FACTOR},
+                {"ranking_type": Ranking.FACTOR, "details": "true"},
+            ],
+        )
+
+    def test_game_rankings(self):
+        """Rankings of a single game, filtered by type and date.
+
+        Without a type, all types are requested, but only some are packed.
+        """
+        self._assert_same(
+            "/api/games/5/rankings/",
+            [
+                {"ranking_type": Ranking.BGG},
+                {"ranking_type": [Ranking.BGG, Ranking.FACTOR]},
+                {
+                    "ranking_type": f"{Ranking.BGG},{Ranking.FACTOR}",
+                    "date__gte": "2020-01-12",
+                    "date__lte": "2020-01-26",
+                },
+                {"ranking_type": Ranking.FACTOR, "date__gte": "2020-01-19"},
+            ],
+        )
+
+    def test_history(self):
+        """History of the top games, as rows and columns."""
+        self._assert_same(
+            "/api/games/history/",
+            [
+                {"top": 5, "fields": "bgg_id"},
+                {"top": 3, "fields": "bgg_id", "columnar": "true"},
+                {"top": 2, "fields": "bgg_id", "date__lte": "2020-01-20"},
+                {"top": 3, "fields": "bgg_id", "ranking_type": Ranking.FACTOR},
+            ],
+        )
+
+    @override_settings(RANKING_SERIES_ENABLED=False)
+    def test_series_disabled(self):
+        """Without series, rankings are read from rows."""
+        with self.assertNumQueries(1):
+            data = self._get("/api/games/1/rankings/", {"ranking_type": Ranking.BGG})
+        self.assertEqual(len(data), 6)
+
+    def test_partial(self):
+        """Types missing from the catalogue are read from rows."""
+        RankingDate.objects.filter(ranking_type=Ranking.FACTOR).delete()
+        RankingSeries.objects.filter(ranking_type=Ranking.FACTOR).delete()
+        _clear_caches()
+        data = self._get("/api/rankings/dates/", {"ranking_type": Ranking.FACTOR})
+        self.assertEqual(len(data), 6)
+        data = self._get("/api/games/1/rankings/", {})
+        self.assertEqual(len(data), 12)
+
+
+class FastJSONRendererTest(TestCase):
+    """API JSON is rendered by orjson."""
+
+    def test_renderer(self):
+        """FastJSONRenderer is the default and orjson is installed."""
+        self.assertIs(api_settings.DEFAULT_RENDERER_CLASSES[0], FastJSONRenderer)
+        self.assertIsNotNone(orjson)
+
+    def test_floats(self):
+        """Non-finite floats become null, small floats use plain notation."""
+        data = {"nan": float("nan"), "inf": float("inf"), "small": 1e-5, "one": 0.1}
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            b'{"nan":null,"inf":null,"small":0.00001,"one":0.1}',
+        )
+
+
+class KeysetPaginationTest(TestCase):
+    """Walking the cursors returns exactly the ordered queryset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for bgg_id in range(1, 61):
+            # ties and nulls in every key
+            Game.objects.create(
+                bgg_id=bgg_id,
+                name=f"Game {bgg_id}",
+                rec_rating=None if bgg_id % 7 == 0 else float(bgg_id % 5),
+                bayes_rating=None if bgg_id % 3 == 0 else float(bgg_id % 4),
+                avg_rating=float(bgg_id % 2),
+            )
+            for day in range(bgg_id % 3):
+                Ranking.objects.create(
+                    game_id=bgg_id,
+                    ranking_type=Ranking.BGG if bgg_id % 2 else Ranking.FACTOR,
+                    rank=bgg_id % 4 + 1,
+                    date=date(2020, 1, 1) + timedelta(days=day),
+                )
+
+    def setUp(self):
+        _clear_caches()
+
+    def _walk(self, path, params, key):
+        results = []
+        response = self.client.get(path, {**params, "cursor": ""})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            results.extend(item[key] for item in data["results"])
+            if not data["next"]:
+                return results
+            response = self.client.get(data["next"])
+
+    def test_games(self):
+        """Games in order of ratings, nulls last, then ID."""
+        expected = list(
+            Game.objects.order_by(
+                F("rec_rating").desc(nulls_last=True),
+                F("bayes_rating").desc(nulls_last=True),
+                F("avg_rating").desc(nulls_last=True),
+                "bgg_id",
+            ).values_list("bgg_id", flat=True)
+        )
+        self.assertEqual(self._walk("/api/games/", {}, "bgg_id"), expected)
+
+    def test_rankings(self):
+        """Rankings in order of type, date and rank."""
+        expected = list(
+            Ranking.objects.order_by("ranking_type", "date", "rank", "id").values_list(
+                "game_id", flat=True
+            )
+        )
+        self.assertEqual(
+            self._walk("/api/rankings/", {"page_size": 7}, "game"), expected
+        )
+
+    def test_single_query(self):
+        """Each page of rankings takes a single query."""
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/rankings/", {"cursor": "", "page_size": 7})
+        with self.assertNumQueries(1):
+            self.client.get(response.json()["next"])
+
+    def test_invalid_cursor(self):
+        """Malformed cursors and cursors with invalid values are not found."""
+
+        def encode(values):
+            data = json.dumps(values).encode("utf-8")
+            return base64.urlsafe_b64encode(data).decode("ascii")
+
+        for cursor in (
+            "not a cursor",
+            encode({"rec_rating": 1}),
+            encode([1.0, 1.0]),
+            encode([{}, 1.0, 1.0, 1]),
+            encode(["abc", 1.0, 1.0, 1]),
+        ):
+            response = self.client.get("/api/games/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_browsable_api(self):
+        """The browsable API renders the next page control."""
+        response = self.client.get(
+            "/api/rankings/", {"cursor": "", "page_size": 7}, HTTP_ACCEPT="text/html"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "cursor=")
+
+
+class SearchTest(TransactionTestCase):
+    """Searches against a built index.
+
+    The index is created outside the migrations and doesn't survive rolling
+    back a savepoint, so these tests commit and drop it afterwards.
+    """
+
+    def setUp(self):
+        _clear_caches()
+        for bgg_id, name, alt_name, num_votes in (
+            (1, "Hamburg", None, 300),
+            (2, "Burgundy", None, 100),
+            (3, "The Castles of Burgundy", ["Die Burgen von Burgund"], 200),
+            (4, "Go", None, 50),
+            (5, "Agricola", None, 400),
+        ):
+            Game.objects.create(
+                bgg_id=bgg_id, name=name, alt_name=alt_name, num_votes=num_votes
+            )
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {search.SEARCH_TABLE}")
+        _clear_caches()
+
+    def _search(self, term):
+        response = self.client.get("/api/games/", {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [game["bgg_id"] for game in response.json()["results"]]
+
+    def test_no_index(self):
+        """Without an index, search falls back to substrings with LIKE."""
+        self.assertEqual(sorted(self._search("burg")), [1, 2, 3])
+
+    def test_trigram(self):
+        """Trigrams match substrings, exact names first, then by votes."""
+        self.assertEqual(build_search_index(), TRIGRAM)
+        self.assertEqual(sorted(self._search("burg")), [1, 2, 3])
+        self.assertEqual(self._search("burgundy"), [2, 3])
+        self.assertEqual(self._search("burgen"), [3])
+        self.assertEqual(self._search("castles burgundy"), [3])
+
+    def test_short_terms(self):
+        """Terms shorter than a trigram are matched with LIKE."""
+        self.assertEqual(build_search_index(), TRIGRAM)
+        self.assertEqual(self._search("go"), [4])
+        self.assertEqual(self._search("gr agri"), [5])
+
+    def test_unicode(self):
+        """Without trigrams, the index matches word prefixes only."""
+        create_table = search._create_table
+
+        def no_trigram(cursor, tokenizer):
+            if tokenizer == TRIGRAM:
+                raise DatabaseError("no such tokenizer: trigram")
+            create_table(cursor, tokenizer)
+
+        with mock.patch("games.search._create_table", side_effect=no_trigram):
+            self.assertEqual(build_search_index(), UNICODE)
+        self.assertEqual(sorted(self._search("burg")), [2, 3])
+        self.assertEqual(self._search("burgund"), [2, 3])
+        self.assertEqual(self._search("go"), [4])
@@ -0,0 +1,323 @@
+"""Compact ranking storage: run-length encoded time series per game and type,
+and a catalogue of the dates with rankings."""
+
+import logging
+from array import array
+from collections import defaultdict
+from datetime import date as Date
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .caches import data_version
+from .models import Ranking, RankingDate, RankingSeries
+
+LOGGER = logging.getLogger(__name__)
+
+DTYPE = "<i4"
+# Formats: (value, run length) pairs, or plain values if that's shorter
+RUN_LENGTH = b"r"
+PLAIN = b"p"
+
+
+def pack(values: Iterable[int], delta: bool = False) -> bytes:
+    """Run-length encode the values, or their differences if delta is set."""
+
+    values = np.asarray(values, dtype=np.int64)
+    if not len(values):
+        return b""
+    if delta:
+        values = np.diff(values, prepend=0)
+
+    starts = np.flatnonzero(np.diff(values, prepend=values[0] - 1))
+    if 2 * len(starts) >= len(values):
+        return PLAIN + values.astype(DTYPE).tobytes()
+    lengths = np.diff(np.append(starts, len(values)))
+    pairs = np.column_stack((values[starts], lengths))
+    return RUN_LENGTH + pairs.astype(DTYPE).tobytes()
+
+
+def unpack(data, delta: bool = False) -> np.ndarray:
+    """Inverse of pack."""
+
+    data = bytes(data or b"")
+    if data[:1] == PLAIN:
+        values = np.frombuffer(data, dtype=DTYPE, offset=1).astype(np.int64)
+    else:
+        pairs = np.frombuffer(data, dtype=DTYPE, offset=min(len(data), 1))
+        pairs = pairs.reshape(-1, 2).astype(np.int64)
+        values = np.repeat(pairs[:, 0], pairs[:, 1])
+    return np.cumsum(values) if delta else values
+
+
+def _to_date(value) -> Optional[Date]:
+    """Same conversion the ORM applies to date lookups."""
+    return Ranking._meta.get_field("date").to_python(value) if value else None
+
+
+def make_series(
+    game_id: int, ranking_type: str, ordinals: Iterable[int], ranks: Iterable[int]
+) -> RankingSeries:
+    """Pack the rankings of one game and type, given as date ordinals and ranks."""
+
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    ranks = np.asarray(ranks, dtype=np.int64)
+    order = np.lexsort((ranks, ordinals))
+    ordinals = ordinals[order]
+    ranks = ranks[order]
+
+    best_rank = ranks.min()
+    best_date = ordinals[ranks == best_rank].max()
+
+    return RankingSeries(
+        game_id=game_id,
+        ranking_type=ranking_type,
+        count=len(ranks),
+        first_date=Date.fromordinal(int(ordinals[0])),
+        last_date=Date.fromordinal(int(ordinals[-1])),
+        best_rank=int(best_rank),
+        best_date=Date.fromordinal(int(best_date)),
+        dates=pack(ordinals, delta=True),
+        ranks=pack(ranks),
+    )
+
+
+class SeriesCollector:
+    """Collect single rankings in compact arrays and pack them per game and type."""
+
+    def __init__(self):
+        self._ordinals = defaultdict(lambda: array("l"))
+        self._ranks = defaultdict(lambda: array("l"))
+
+    def add(self, ranking: Ranking) -> None:
+        """Add a (possibly unsaved) ranking."""
+        key = (ranking.game_id, ranking.ranking_type)
+        self._ordinals[key].append(_to_date(ranking.date).toordinal())
+        self._ranks[key].append(int(ranking.rank))
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def series(self) -> Iterable[RankingSeries]:
+        """One packed series per game and type."""
+        for (game_id, ranking_type), ordinals in self._ordinals.items():
+            yield make_series(
+                game_id, ranking_type, ordinals, self._ranks[(game_id, ranking_type)]
+            )
+
+
+class DateCollector:
+    """Count rankings and their rank range per type and date."""
+
+    def __init__(self):
+        self._dates = {}
+
+    def add(self, ranking: Ranking) -> None:
+        """Add a (possibly unsaved) ranking."""
+        key = (ranking.ranking_type, _to_date(ranking.date))
+        rank = int(ranking.rank)
+        stats = self._dates.get(key)
+        if stats is None:
+            self._dates[key] = [1, rank, rank]
+        else:
+            stats[0] += 1
+            stats[1] = min(stats[1], rank)
+            stats[2] = max(stats[2], rank)
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def dates(self) -> Iterable[RankingDate]:
+        """One catalogue entry per type and date."""
+        for (ranking_type, date), (count, min_rank, max_rank) in sorted(
+            self._dates.items()
+        ):
+            yield RankingDate(
+                ranking_type=ranking_type,
+                date=date,
+                count=count,
+                min_rank=min_rank,
+                max_rank=max_rank,
+            )
+
+
+def decode(series: RankingSeries) -> Tuple[np.ndarray, np.ndarray]:
+    """Date ordinals and ranks of a series."""
+    return unpack(series.dates, delta=True), unpack(series.ranks)
+
+
+def _bounds(date_gte=None, date_lte=None) -> Tuple[float, float]:
+    date_gte = _to_date(date_gte)
+    date_lte = _to_date(date_lte)
+    return (
+        date_gte.toordinal() if date_gte else -np.inf,
+        date_lte.toordinal() if date_lte else np.inf,
+    )
+
+
+def _filter_dates(queryset, date_gte=None, date_lte=None):
+    date_gte = _to_date(date_gte)
+    date_lte = _to_date(date_lte)
+    if date_gte:
+        queryset = queryset.filter(last_date__gte=date_gte)
+    if date_lte:
+        queryset = queryset.filter(first_date__lte=date_lte)
+    return queryset
+
+
+@lru_cache(maxsize=8)
+def _series_types(version) -> FrozenSet[str]:
+    # pylint: disable=no-member
+    return frozenset(
+        RankingSeries.objects.order_by()
+        .values_list("ranking_type", flat=True)
+        .distinct()
+    )
+
+
+def series_types() -> FrozenSet[str]:
+    """Ranking types that can be read from packed series."""
+    if not getattr(settings, "RANKING_SERIES_ENABLED", False):
+        return frozenset()
+    return _series_types(data_version())
+
+
+def use_series(ranking_types: Iterable[str]) -> bool:
+    """Whether all the given ranking types can be read from packed series."""
+    available = series_types()
+    return bool(available) and available.issuperset(ranking_types)
+
+
+@lru_cache(maxsize=8)
+def _catalogued_types(version) -> FrozenSet[str]:
+    # pylint: disable=no-member
+    return frozenset(
+        RankingDate.objects.order_by().values_list("ranking_type", flat=True).distinct()
+    )
+
+
+def catalogued_types() -> FrozenSet[str]:
+    """Ranking types with dates in the catalogue."""
+    return _catalogued_types(data_version())
+
+
+def use_catalogue(ranking_types: Optional[Iterable[str]] = None) -> bool:
+    """Whether the catalogue covers the given ranking types, or any if None."""
+    available = catalogued_types()
+    return bool(available) and available.issuperset(ranking_types or ())
+
+
+def last_number_one(ranking_type: str, date_gte=None, date_lte=None) -> Optional[Date]:
+    """Last catalogued date within the range on which a game was ranked first."""
+    # pylint: disable=no-member
+    queryset = RankingDate.objects.filter(ranking_type=ranking_type, min_rank=1)
+    date_gte = _to_date(date_gte)
+    date_lte = _to_date(date_lte)
+    if date_gte:
+        queryset = queryset.filter(date__gte=date_gte)
+    if date_lte:
+        queryset = queryset.filter(date__lte=date_lte)
+    return queryset.order_by("date").values_list("date", flat=True).last()
+
+
+def _dates(ordinals: np.ndarray) -> List[Date]:
+    cache = {}
+    return [
+        cache.setdefault(ordinal, Date.fromordinal(ordinal))
+        for ordinal in ordinals.tolist()
+    ]
+
+
+def game_rankings(
+    game_id: int,
+    ranking_types: Optional[Iterable[str]] = None,
+    date_gte=None,
+    date_lte=None,
+) -> List[dict]:
+    """Rankings of a game in the same shape and order as RankingSerializer."""
+
+    # pylint: disable=no-member
+    queryset = RankingSeries.objects.filter(game=game_id)
+    if ranking_types:
+        queryset = queryset.filter(ranking_type__in=ranking_types)
+    queryset = _filter_dates(queryset, date_gte, date_lte).order_by("ranking_type")
+    start, end = _bounds(date_gte, date_lte)
+
+    result = []
+    for series in queryset:
+        ordinals, ranks = decode(series)
+        selected = (ordinals >= start) & (ordinals <= end)
+        for rank, date in zip(ranks[selected].tolist(), _dates(ordinals[selected])):
+            result.append(
+                {
+                    "ranking_type": series.ranking_type,
+                    "rank": rank,
+                    "date": date.isoformat(),
+                    "game": series.game_id,
+                }
+            )
+    return result
+
+
+def ranking_history(
+    ranking_type: str,
+    top: int,
+    date_gte=None,
+    date_lte=None,
+    last_date: Optional[Date] = None,
+) -> Tuple[List[int], List[Tuple[int, int, Date]]]:
+    """IDs of the top games on the last date with a number one, and all their
+    (game ID, rank, date) rankings ordered by date.
+
+    The last date is looked up in the series unless given.
+    """
+
+    # pylint: disable=no-member
+    queryset = _filter_dates(
+        RankingSeries.objects.filter(ranking_type=ranking_type), date_gte, date_lte
+    )
+    start, end = _bounds(date_gte, date_lte)
+
+    last = last_date.toordinal() if last_date else None
+    for series in queryset.filter(best_rank=1) if last is None else ():
+        ordinals, ranks = decode(series)
+        ordinals = ordinals[(ranks == 1) & (ordinals >= start) & (ordinals <= end)]
+        if len(ordinals) and (last is None or ordinals.max() > last):
+            last = int(ordinals.max())
+    if last is None:
+        return [], []
+
+    last_date = Date.fromordinal(last)
+    decoded: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    current = []
+    for series in queryset.filter(
+        best_rank__lte=top, first_date__lte=last_date, last_date__gte=last_date
+    ):
+        ordinals, ranks = decode(series)
+        ranks_on_date = ranks[ordinals == last]
+        if len(ranks_on_date) and ranks_on_date.min() <= top:
+            current.append((int(ranks_on_date.min()), series.game_id))
+            selected = (ordinals >= start) & (ordinals <= end)
+            decoded[series.game_id] = (ordinals[selected], ranks[selected])
+
+    bgg_ids = [bgg_id for _, bgg_id in sorted(current)]
+    if not bgg_ids:
+        return [], []
+
+    game_ids = np.concatenate(
+        [np.full(len(decoded[bgg_id][0]), bgg_id) for bgg_id in bgg_ids]
+    )
+    ordinals = np.concatenate([decoded[bgg_id][0] for bgg_id in bgg_ids])
+    ranks = np.concatenate([decoded[bgg_id][1] for bgg_id in bgg_ids])
+    order = np.argsort(ordinals, kind="stable")
+
+    rankings = list(
+        zip(
+            game_ids[order].tolist(),
+            ranks[order].tolist(),
+            _dates(ordinals[order]),
+        )
+    )
+    return bgg_ids, rankings
@@ -1,46 +1,62 @@
 """ views """
 from collections import OrderedDict
+import base64
+import hashlib
+import json
 import logging
-from datetime import timedelta, timezone
-from functools import lru_cache, reduce
+from datetime import datetime, timedelta, timezone
 from itertools import chain
-from operator import or_
 from typing import Any, Callable, Iterable, Optional, Union
 
-import pandas as pd
+import numpy as np
 from django.conf import settings
-from django.db.models import Count, Min, Q
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, F, Max, Min, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.query import FlatValuesListIterable, ModelIterable, ValuesIterable
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.template import loader
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
 from django.utils.timezone import now
 from django_filters import FilterSet
 from django_filters.rest_framework import DjangoFilterBackend
 from pytility import arg_to_iter, clear_list, parse_bool, parse_date, parse_int, to_str
 from rest_framework.decorators import action
 from rest_framework.exceptions import (
+    APIException,
     MethodNotAllowed,
     NotAuthenticated,
     NotFound,
     PermissionDenied,
+    ValidationError,
 )
 from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.status import (
+    HTTP_200_OK,
     HTTP_202_ACCEPTED,
     HTTP_204_NO_CONTENT,
+    HTTP_304_NOT_MODIFIED,
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
     HTTP_500_INTERNAL_SERVER_ERROR,
     HTTP_501_NOT_IMPLEMENTED,
 )
 from rest_framework.throttling import AnonRateThrottle
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_csv.renderers import PaginatedCSVRenderer
+from rest_framework_csv.renderers import CSVStreamingRenderer, PaginatedCSVRenderer
 
 from games.collections import all_collection, any_collection, none_collection
+from .caches import count_cache, data_version, response_cache
+from .masks import game_masks, to_id_array, user_collection
 from .models import (
     Category,
     Collection,
@@ -49,9 +65,13 @@ from .models import (
     Mechanic,
     Person,
     Ranking,
+    RankingDate,
     User,
 )
+from .pagination import CachedCountPagination
 from .permissions import AlwaysAllowAny, ReadOnly
+from .renderers import FastJSONRenderer
+from .scoring import AGGREGATIONS, rank_similar, rank_users, top_per_user
 from .serializers import (
     CategorySerializer,
     CollectionSerializer,
@@ -62,6 +82,21 @@ from .serializers import (
     RankingFatSerializer,
     RankingSerializer,
     UserSerializer,
+    game_field_names,
+    prefetch_game_relations,
+    serialize_games,
+    stored_game_json,
+)
+from .search import SEARCH_TABLE, search_condition
+from .similarity import load_similar_games
+from .stats import STATS_MODELS, STATS_SITES, games_stats, stats_snapshot
+from .table import game_table
+from .timeseries import (
+    game_rankings,
+    last_number_one,
+    ranking_history,
+    use_catalogue,
+    use_series,
 )
 from .utils import (
     load_recommender,
@@ -72,9 +107,126 @@ from .utils import (
 
 LOGGER = logging.getLogger(__name__)
 PAGE_SIZE = api_settings.PAGE_SIZE or 25
+MAX_BATCH_GAMES = 1000
+EXPORT_CHUNK_SIZE = 5_000
+
+
+class NotModified(APIException):
+    """The client's cached copy is still current."""
+
+    status_code = HTTP_304_NOT_MODIFIED
+
+
+def _last_modified(version):
+    timestamps = [
+        value.timestamp() if isinstance(value, datetime) else value
+        for value in version
+        if value is not None
+    ]
+    return int(max(timestamps)) if timestamps else None
+
+
+class ConditionalGetMixin:
+    """Answer conditional GET requests from the data version.
+
+    Data only changes with a new deployment of the database and models, so
+    ETags are derived from the data version and the normalized request. A
+    matching If-None-Match (or If-Modified-Since) short-circuits the request
+    with 304 before the handler runs. Responses get max-age per action, see
+    settings.CACHE_CONTROL_MAX_AGE.
+
+    Writes through the API don't change the data version, so conditional
+    requests are only answered if settings.READ_ONLY is on.
+    """
+
+    conditional_exempt_actions = ("cache_stats",)
+
+    def _conditional(self, request):
+        return (
+            settings.CONDITIONAL_GET_ENABLED
+            and settings.READ_ONLY
+            and request.method in ("GET", "HEAD")
+            and self.action not in self.conditional_exempt_actions
+        )
+
+    def _validators(self, request):
+        version = data_version()
+        params = tuple(
+            (key, tuple(values)) for key, values in sorted(request.query_params.lists())
+        )
+        key = (
+            version,
+            server_version()["server_version"],
+            request.scheme,
+            request.get_host(),
+            request.path,
+            request.accepted_media_type,
+            params,
+        )
+        etag = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return quote_etag(etag), _last_modified(version)
+
+    def initial(self, request, *args, **kwargs):
+        """Raise NotModified if the client's copy matches the validators."""
 
+        super().initial(request, *args, **kwargs)
 
-class PermissionsModelViewSet(ModelViewSet):
+        if not self._conditional(request):
+            return
+
+        etag, last_modified = self._validators(request)
+        request.conditional_validators = (etag, last_modified)
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if "*" in etags or etag in etags:
+                raise NotModified()
+            return
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get("HTTP_IF_MODIFIED_SINCE")
+        )
+        if (
+            if_modified_since is not None
+            and last_modified is not None
+            and last_modified <= if_modified_since
+        ):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        """Answer NotModified with an empty 304 response."""
+        if isinstance(exc, NotModified):
+            return Response(status=exc.status_code)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Add validators and caching headers to 200 and 304 responses."""
+
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        validators = getattr(request, "conditional_validators", None)
+        if validators is None or response.status_code not in (
+            HTTP_200_OK,
+            HTTP_304_NOT_MODIFIED,
+        ):
+            return response
+
+        etag, last_modified = validators
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        max_ages = settings.CACHE_CONTROL_MAX_AGE
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=max_ages.get(self.action, max_ages["default"]),
+        )
+        patch_vary_headers(response, ("Accept",))
+        return response
+
+
+class PermissionsModelViewSet(ConditionalGetMixin, ModelViewSet):
     """add permissions based on settings"""
 
     def get_permissions(self):
@@ -99,7 +251,7 @@ class GamesActionViewSet(PermissionsModelViewSet):
         """find all games"""
 
         obj = self.get_object()
-        queryset = self.filter_queryset(obj.games.all())
+        queryset = prefetch_game_relations(self.filter_queryset(obj.games.all()))
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -158,6 +310,244 @@ class BGGParamsPagination(BodyParamsPagination):
     parsers = (to_str, parse_int)
 
 
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks by the values of all ordering keys.
+
+    Unlike offsets, the cursor encodes the keys of the last row, so deep pages
+    cost the same as the first one (given an index on the keys). The ordering
+    must end in a unique key; nulls sort first ascending and last descending.
+    """
+
+    cursor_query_param = "cursor"
+    display_page_controls = True
+    template = "rest_framework/pagination/previous_and_next.html"
+
+    def __init__(self, ordering, page_size):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+        self.request = None
+        self.next_cursor = None
+
+    def encode_cursor(self, values):
+        """Opaque cursor for the given key values."""
+        data = json.dumps(values, cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, cursor):
+        """Key values from the given cursor, None for the first page."""
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except (TypeError, ValueError) as exc:
+            raise NotFound("Invalid cursor") from exc
+        if (
+            not isinstance(values, list)
+            or len(values) != len(self.ordering)
+            or not all(
+                value is None or isinstance(value, (int, float, str))
+                for value in values
+            )
+        ):
+            raise NotFound("Invalid cursor")
+        return values
+
+    def _clean(self, model, values):
+        """Key values converted to their fields' types."""
+        if values is None:
+            return None
+        try:
+            return [
+                None
+                if value is None
+                else model._meta.get_field(key.lstrip("-")).to_python(value)
+                for key, value in zip(self.ordering, values)
+            ]
+        except DjangoValidationError as exc:
+            raise NotFound("Invalid cursor") from exc
+
+    def _order_by(self, model):
+        for key in self.ordering:
+            name = key.lstrip("-")
+            if not model._meta.get_field(name).null:
+                yield key
+            elif key.startswith("-"):
+                yield F(name).desc(nulls_last=True)
+            else:
+                yield F(name).asc(nulls_first=True)
+
+    def _after(self, model, values):
+        """Condition for rows strictly after the given key values."""
+
+        after = None
+        equal = Q()
+
+        for key, value in zip(self.ordering, values):
+            name = key.lstrip("-")
+            if key.startswith("-"):
+                greater = None if value is None else Q(**{f"{name}__lt": value})
+                if greater is not None and model._meta.get_field(name).null:
+                    greater |= Q(**{f"{name}__isnull": True})
+            else:
+                greater = (
+                    Q(**{f"{name}__isnull": False})
+                    if value is None
+                    else Q(**{f"{name}__gt": value})
+                )
+            if greater is not None:
+                after = equal & greater if after is None else after | equal & greater
+            equal &= (
+                Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+            )
+
+        return after
+
+    def _segments(self, model, values):
+        """Conditions for the rows after the cursor, to be queried in turn.
+
+        Each segment bounds the first key by a plain range, so the database
+        can seek in an index on the keys instead of scanning. Nulls in the
+        first key form their own segment.
+        """
+
+        if values is None:
+            return [None]
+
+        after = self._after(model, values)
+        if after is None:
+            return []
+
+        key, value = self.ordering[0], values[0]
+        name = key.lstrip("-")
+        nullable = model._meta.get_field(name).null
+        descending = key.startswith("-")
+
+        if value is None:
+            first = Q(**{f"{name}__isnull": True})
+            # nulls come first ascending, so all other values follow
+            rest = [Q(**{f"{name}__isnull": False})] if not descending else []
+        else:
+            first = Q(**{f"{name}__{'lte' if descending else 'gte'}": value})
+            # nulls come last descending
+            rest = [Q(**{f"{name}__isnull": True})] if descending and nullable else []
+
+        return [first & after] + rest
+
+    def _fetch(self, queryset, limit):
+        """Up to limit rows and their key values, fetched in a single query.
+
+        Works with model instances as well as values() and values_list()
+        querysets, which must name their fields.
+        """
+
+        model = queryset.model
+        names = [
+            model._meta.get_field(key.lstrip("-")).attname for key in self.ordering
+        ]
+
+        if queryset._iterable_class is ModelIterable:
+            rows = list(queryset[:limit])
+            return rows, [[getattr(row, name) for name in names] for row in rows]
+
+        # Select the keys after the requested fields and split them off again
+        selected = queryset._fields
+        width = len(selected)
+        rows = list(queryset.values_list(*selected, *names)[:limit])
+        keys = [list(row[width:]) for row in rows]
+        if queryset._iterable_class is FlatValuesListIterable:
+            rows = [row[0] for row in rows]
+        elif queryset._iterable_class is ValuesIterable:
+            rows = [dict(zip(selected, row[:width])) for row in rows]
+        else:
+            rows = [row[:width] for row in rows]
+        return rows, keys
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise ValidationError(
+                {api_settings.ORDERING_PARAM: "not supported with cursor pagination"}
+            )
+
+        values = self._clean(
+            queryset.model,
+            self.decode_cursor(request.query_params.get(self.cursor_query_param)),
+        )
+        queryset = queryset.order_by(*self._order_by(queryset.model))
+
+        # One row more than the page tells whether there is a next page
+        rows = []
+        keys = []
+        for segment in self._segments(queryset.model, values):
+            remaining = self.page_size + 1 - len(rows)
+            if remaining <= 0:
+                break
+            segment_queryset = queryset if segment is None else queryset.filter(segment)
+            segment_rows, segment_keys = self._fetch(segment_queryset, remaining)
+            rows.extend(segment_rows)
+            keys.extend(segment_keys)
+
+        self.next_cursor = (
+            self.encode_cursor(keys[self.page_size - 1])
+            if len(rows) > self.page_size
+            else None
+        )
+
+        return rows[: self.page_size]
+
+    def get_next_link(self):
+        """Link to the next page, if any."""
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                (
+                    ("next", self.get_next_link()),
+                    ("results", data),
+                )
+            )
+        )
+
+    def to_html(self):
+        return loader.get_template(self.template).render(
+            {"previous_url": None, "next_url": self.get_next_link()}
+        )
+
+
+class KeysetPaginationMixin:
+    """Opt into keyset pagination with the cursor parameter.
+
+    Applies to keyset_actions, ordered by keyset_ordering; all other requests
+    keep using pagination_class.
+    """
+
+    keyset_ordering = ()
+    keyset_actions = ("list",)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and (
+            self.keyset_ordering
+            and self.action in self.keyset_actions
+            and KeysetPagination.cursor_query_param in self.request.query_params
+        ):
+            page_size = (
+                self.pagination_class().get_page_size(self.request)
+                if self.pagination_class is not None
+                else None
+            )
+            self._paginator = KeysetPagination(
+                ordering=self.keyset_ordering,
+                page_size=page_size or api_settings.PAGE_SIZE,
+            )
+        return super().paginator
+
+
 class PaginatedCSVGameRenderer(PaginatedCSVRenderer):
     header = [
         "bgg_id",
@@ -227,6 +617,63 @@ def _extract_params(request, key, parser=None):
             yield value
 
 
+def _game_fields_param(request):
+    """Game fields selected by the fields and omit parameters, None for all."""
+
+    fields = frozenset(_extract_params(request, "fields"))
+    omit = frozenset(_extract_params(request, "omit"))
+    if not fields and not omit:
+        return None
+
+    names = game_field_names()
+    unknown = (fields | omit) - frozenset(names)
+    if unknown:
+        raise ValidationError(
+            {"fields": f"unknown fields: {', '.join(sorted(unknown))}"}
+        )
+
+    return tuple(
+        name for name in names if (not fields or name in fields) and name not in omit
+    )
+
+
+def _response_cache_key(request, endpoint, pk=None):
+    if request.data and not isinstance(request.data, dict):
+        return None
+    renderer = getattr(request, "accepted_renderer", None)
+    if renderer is None or renderer.format not in settings.RESPONSE_CACHE_FORMATS:
+        return None
+
+    users = tuple(sorted(user.lower() for user in _extract_params(request, "user")))
+    like = tuple(sorted(frozenset(_extract_params(request, "like", parse_int))))
+    keys = frozenset(request.query_params) | frozenset(request.data)
+    params = tuple(
+        (key, tuple(_extract_params(request, key)))
+        for key in sorted(keys - {"user", "like"})
+    )
+
+    key = (
+        endpoint,
+        pk,
+        request.scheme,
+        request.get_host(),
+        request.accepted_media_type,
+        users,
+        like,
+        params,
+    )
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _first_param(request, key, parser=None, default=None):
+    return next(_extract_params(request, key, parser), default)
+
+
 def _light_games(bgg_ids=None):
     # pylint: disable=no-member
     games = (
@@ -251,15 +698,6 @@ def _add_games(data, bgg_ids=None, key="game"):
     return data
 
 
-@lru_cache(maxsize=8)
-def _get_compilations():
-    return frozenset(
-        Game.objects.filter(compilation=True)
-        .order_by()
-        .values_list("bgg_id", flat=True)
-    )
-
-
 def _gitlab_merge_request(
     users: Union[str, Iterable[str]],
     access_days: int = 365,
@@ -314,6 +752,46 @@ def _gitlab_merge_request(
     )
 
 
+class GameSearchFilter(SearchFilter):
+    """Search names and alternative names in the full-text index if available.
+
+    Results are ordered by match quality (exact name, then BM25 rank) and
+    number of votes, unless an explicit ordering was requested. Falls back to
+    SearchFilter if there is no index or it can't answer the query.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        condition = search_condition(terms) if terms else None
+        if condition is None:
+            return super().filter_queryset(request, queryset, view)
+
+        sql, params, query = condition
+        queryset = queryset.filter(
+            bgg_id__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {sql}", params)
+        )
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+
+        db_table = queryset.model._meta.db_table
+        rank = (
+            RawSQL(
+                f"SELECT bm25({SEARCH_TABLE}, 10.0, 1.0) FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {db_table}.bgg_id",
+                (query,),
+            )
+            if query
+            else Value(0.0)
+        )
+        return queryset.annotate(
+            search_exact=RawSQL(
+                f"{db_table}.name = %s COLLATE NOCASE", (" ".join(terms),)
+            ),
+            search_rank=rank,
+        ).order_by("-search_exact", "search_rank", "-num_votes")
+
+
 class GameFilter(FilterSet):
     """game filter"""
 
@@ -360,16 +838,27 @@ class GameFilter(FilterSet):
         }
 
 
-class GameViewSet(PermissionsModelViewSet):
+class GameFilterBackend(DjangoFilterBackend):
+    """Filter backend that takes the filter parameters from the view."""
+
+    def get_filterset_kwargs(self, request, queryset, view):
+        kwargs = super().get_filterset_kwargs(request, queryset, view)
+        kwargs["data"] = view.get_filter_data()
+        return kwargs
+
+
+class GameViewSet(KeysetPaginationMixin, PermissionsModelViewSet):
     """game view set"""
 
     # pylint: disable=no-member
     queryset = Game.objects.all()
     ordering = ("-rec_rating", "-bayes_rating", "-avg_rating")
+    keyset_ordering = ("-rec_rating", "-bayes_rating", "-avg_rating", "bgg_id")
     serializer_class = GameSerializer
 
-    filter_backends = (DjangoFilterBackend, OrderingFilter, SearchFilter)
+    filter_backends = (GameFilterBackend, OrderingFilter, GameSearchFilter)
     filterset_class = GameFilter
+    body_filter_actions = ("recommend_batch",)
 
     ordering_fields = (
         "year",
@@ -399,19 +888,110 @@ class GameViewSet(PermissionsModelViewSet):
 
     collection_fields = ("owned",)
 
-    stats_sites = {"rg_top": "rec_rank", "bgg_top": "bgg_rank"}
+    stats_sites = STATS_SITES
+    stats_models = STATS_MODELS
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "retrieve":
+            return prefetch_game_relations(queryset)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        fields = _game_fields_param(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        bgg_ids = queryset.values_list("bgg_id", flat=True)
+        page = self.paginate_queryset(bgg_ids)
+        if page is not None:
+            return self.get_paginated_response(serialize_games(page, fields=fields))
+        return Response(serialize_games(bgg_ids, fields=fields))
+
+    def retrieve(self, request, *args, **kwargs):
+        fields = _game_fields_param(request)
+        if fields is not None:
+            lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+            queryset = self.filter_queryset(self.get_queryset()).filter(bgg_id=lookup)
+            games = serialize_games(
+                queryset.values_list("bgg_id", flat=True), fields=fields
+            )
+            if not games:
+                raise NotFound()
+            return Response(games[0])
+
+        renderer = request.accepted_renderer
+        if (
+            renderer.format == "json"
+            and request.accepted_media_type == renderer.media_type
+        ):
+            pk = parse_int(kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+            data = stored_game_json(pk) if pk is not None else None
+            if data is not None:
+                if (
+                    self._filtered(request)
+                    and not self.filter_queryset(self.get_queryset())
+                    .filter(bgg_id=pk)
+                    .exists()
+                ):
+                    raise NotFound()
+                return HttpResponse(data, content_type=renderer.media_type)
+        return super().retrieve(request, *args, **kwargs)
+
+    def _filtered(self, request):
+        """Whether the request has any filter or search parameters."""
+        return any(
+            key in self.filterset_class.base_filters or key == api_settings.SEARCH_PARAM
+            for key in request.query_params
+        )
+
+    def get_filter_data(self):
+        """Filter parameters of the request.
 
-    stats_models = {
-        "designer": (Person.objects.exclude(bgg_id=3), "designer_of", PersonSerializer),
-        "artist": (Person.objects.exclude(bgg_id=3), "artist_of", PersonSerializer),
-        "game_type": (GameType.objects.all(), "games", GameTypeSerializer),
-        "category": (Category.objects.all(), "games", CategorySerializer),
-        "mechanic": (Mechanic.objects.all(), "games", MechanicSerializer),
-    }
+        Actions in body_filter_actions also accept filters in the request body.
+        """
+
+        if self.action not in self.body_filter_actions or not isinstance(
+            self.request.data, dict
+        ):
+            return self.request.query_params
+
+        data = self.request.query_params.copy()
+        for key in frozenset(self.request.data) & frozenset(
+            self.filterset_class.base_filters
+        ):
+            data.setlist(
+                key, [str(value) for value in _extract_params(self.request, key)]
+            )
+        return data
+
+    def _filtered_games_mask(self, table):
+        """Mask over the game table of all games matching the request's filters."""
+
+        if not self.request.query_params.get(api_settings.SEARCH_PARAM):
+            filterset = self.filterset_class(
+                data=self.get_filter_data(),
+                queryset=self.get_queryset(),
+                request=self.request,
+            )
+            mask = table.filterset_mask(filterset)
+            if mask is not None:
+                return mask
+
+        bgg_ids = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .values_list("bgg_id", flat=True)
+        )
+        return np.isin(table.bgg_id, to_id_array(bgg_ids))
+
+    def _filtered_game_ids(self):
+        """IDs of all games matching the request's filters."""
+        table = game_table()
+        return table.bgg_id[self._filtered_games_mask(table)]
 
     def _excluded_games(
         self,
         *,
+        masks,
         user=None,
         exclude_ids=None,
         exclude_compilations=True,
@@ -421,41 +1001,26 @@ class GameViewSet(PermissionsModelViewSet):
         exclude_play_count=None,
         exclude_clusters=False,
     ):
-        exclude_ids = frozenset(arg_to_iter(exclude_ids))
+        exclude_ids = to_id_array(exclude_ids)
 
         if user:
-            queries = []
-
-            if exclude_known:
-                queries.append(Q(rating__isnull=False))
-            if exclude_owned:
-                queries.append(Q(owned=True))
-            if exclude_wishlist:
-                queries.append(Q(wishlist__lte=exclude_wishlist))
-            if exclude_play_count:
-                queries.append(Q(play_count__gte=exclude_play_count))
-
-            if queries:
-                query = reduce(or_, queries)
-                exclude_ids |= frozenset(
-                    Collection.objects.filter(user=user)
-                    .filter(query)
-                    .order_by()
-                    .values_list("game_id", flat=True)
-                )
-
-        if exclude_clusters and exclude_ids:
-            exclude_ids |= frozenset(
-                self.get_queryset()
-                .filter(cluster__in=exclude_ids)
-                .order_by()
-                .values_list("bgg_id", flat=True)
+            collection_ids = user_collection(user).select(
+                exclude_known=exclude_known,
+                exclude_owned=exclude_owned,
+                exclude_wishlist=exclude_wishlist,
+                exclude_play_count=exclude_play_count,
             )
+            exclude_ids = np.concatenate((exclude_ids, collection_ids))
+
+        exclude_mask = masks.mask(exclude_ids)
+
+        if exclude_clusters and len(exclude_ids):
+            exclude_mask |= masks.cluster_mates(exclude_ids)
 
         if exclude_compilations:
-            exclude_ids |= _get_compilations()
+            exclude_mask |= masks.compilations
 
-        return exclude_ids
+        return exclude_mask
 
     def _included_games(
         self,
@@ -471,8 +1036,13 @@ class GameViewSet(PermissionsModelViewSet):
         exclude_play_count=None,
         exclude_clusters=False,
     ):
-        include_ids = frozenset(arg_to_iter(include_ids))
-        exclude_ids = self._excluded_games(
+        """Mask of games to recommend, indexed like the recommender's games."""
+
+        # We can only recommend games known to the recommender
+        masks = game_masks(recommender)
+        include_mask = masks.mask(include_ids)
+        exclude_mask = self._excluded_games(
+            masks=masks,
             user=user,
             exclude_ids=exclude_ids,
             exclude_compilations=exclude_compilations,
@@ -482,19 +1052,13 @@ class GameViewSet(PermissionsModelViewSet):
             exclude_play_count=exclude_play_count,
             exclude_clusters=exclude_clusters,
         )
-        # If explicitly included, we don't exclude them here
-        exclude_ids -= include_ids
 
         # Add all potential games not filtered out by query
-        include_ids |= frozenset(
-            self.filter_queryset(self.get_queryset())
-            .order_by()
-            .values_list("bgg_id", flat=True)
-        )
-        # We can only recommend games known to the recommender
-        include_ids &= recommender.rated_games
-        # Remove all excluded games
-        return include_ids - exclude_ids
+        candidates = masks.mask(self._filtered_game_ids())
+        # Remove all excluded games, unless explicitly included
+        candidates &= ~exclude_mask
+        candidates |= include_mask
+        return candidates
 
     def _collection(
         self,
@@ -533,7 +1097,7 @@ class GameViewSet(PermissionsModelViewSet):
         if user not in recommender.known_users:
             raise NotFound(f"user <{user}> could not be found")
 
-        include_ids = self._included_games(
+        candidates = self._included_games(
             user=user,
             recommender=recommender,
             include_ids=include_ids,
@@ -546,16 +1110,7 @@ class GameViewSet(PermissionsModelViewSet):
             exclude_clusters=exclude_clusters,
         )
 
-        if not include_ids:
-            return ()
-
-        recommendations = recommender.recommend(users=(user,))
-        recommendations = recommendations[
-            recommendations.index.isin(include_ids)
-        ].copy()
-        recommendations[(user, "rank")] = range(1, len(recommendations) + 1)
-
-        return recommendations
+        return rank_users(recommender, [user], candidates)
 
     def _recommend_group_rating(
         self,
@@ -566,6 +1121,7 @@ class GameViewSet(PermissionsModelViewSet):
         exclude_ids=None,
         exclude_clusters=False,
         exclude_compilations=True,
+        aggregation="mean",
     ):
         users = (user.lower() for user in users if user)
         users = [user for user in users if user in recommender.known_users]
@@ -574,7 +1130,7 @@ class GameViewSet(PermissionsModelViewSet):
 
         # TODO include / exclude games based on users' collections (#228)
         # Cf the collections module and recommend_random()
-        include_ids = self._included_games(
+        candidates = self._included_games(
             recommender=recommender,
             include_ids=include_ids,
             exclude_ids=exclude_ids,
@@ -582,24 +1138,7 @@ class GameViewSet(PermissionsModelViewSet):
             exclude_compilations=exclude_compilations,
         )
 
-        if not include_ids:
-            return ()
-
-        recommendations = recommender.recommend(users=users)
-        recommendations = recommendations[recommendations.index.isin(include_ids)]
-        recommendations = (
-            recommendations.xs(axis=1, key="score", level=1)
-            .mean(axis=1)
-            .sort_values(ascending=False)
-        )
-
-        return pd.DataFrame(
-            index=recommendations.index,
-            data={
-                ("_all", "score"): recommendations,
-                ("_all", "rank"): range(1, len(recommendations) + 1),
-            },
-        )
+        return rank_users(recommender, users, candidates, aggregation)
 
     def _recommend_similar(
         self,
@@ -616,7 +1155,7 @@ class GameViewSet(PermissionsModelViewSet):
             raise NotFound("Unable to create recommendations without games")
 
         exclude_ids = frozenset(arg_to_iter(exclude_ids))
-        include_ids = self._included_games(
+        candidates = self._included_games(
             recommender=recommender,
             include_ids=include_ids,
             exclude_ids=exclude_ids | like,
@@ -624,19 +1163,43 @@ class GameViewSet(PermissionsModelViewSet):
             exclude_clusters=exclude_clusters,
         )
 
-        if not include_ids:
-            return ()
+        return rank_similar(recommender, list(like), candidates)
 
-        scores = recommender.recommend_similar(games=like)["score"]
-        scores = scores[scores.index.isin(include_ids)].sort_values(ascending=False)
+    def _cached_response(self, request, endpoint, view, **kwargs):
+        """Serve the response data from the cache, or compute and store it.
+
+        Only data and status are cached; dispatch finalizes and renders the
+        response as usual. The cache is bounded by the size of the data as
+        compact JSON.
+        """
 
-        return pd.DataFrame(
-            index=scores.index,
-            data={
-                ("_all", "score"): scores,
-                ("_all", "rank"): range(1, len(scores) + 1),
-            },
+        key = (
+            _response_cache_key(request, endpoint, **kwargs)
+            if settings.RESPONSE_CACHE_ENABLED
+            else None
         )
+        if key is None:
+            return view(request, **kwargs)
+
+        cache = response_cache()
+        version = data_version()
+        cached = cache.get(key, version=version, label=endpoint)
+        if cached is not None:
+            data, status = cached
+            return Response(data, status=status)
+
+        response = view(request, **kwargs)
+        if not isinstance(response, Response) or response.status_code != HTTP_200_OK:
+            return response
+
+        cache.set(
+            key,
+            (response.data, response.status_code),
+            size=len(FastJSONRenderer().render(response.data)),
+            ttl=settings.RESPONSE_CACHE_TTL.get(endpoint),
+            version=version,
+        )
+        return response
 
     # pylint: disable=redefined-builtin,unused-argument
     @action(
@@ -649,7 +1212,9 @@ class GameViewSet(PermissionsModelViewSet):
     )
     def recommend(self, request, format=None):
         """recommend games"""
+        return self._cached_response(request, "recommend", self._recommend)
 
+    def _recommend(self, request):
         users = list(_extract_params(request, "user", str))
         like = list(_extract_params(request, "like", parse_int))
 
@@ -672,6 +1237,11 @@ class GameViewSet(PermissionsModelViewSet):
         exclude_wishlist = parse_int(request.query_params.get("exclude_wishlist"))
         exclude_play_count = parse_int(request.query_params.get("exclude_play_count"))
         exclude_clusters = parse_bool(request.query_params.get("exclude_clusters"))
+        aggregation = request.query_params.get("aggregation") or "mean"
+        if aggregation not in AGGREGATIONS:
+            raise ValidationError(
+                {"aggregation": f"must be one of {', '.join(AGGREGATIONS)}"}
+            )
 
         recommendation = (
             self._recommend_rating(
@@ -694,6 +1264,7 @@ class GameViewSet(PermissionsModelViewSet):
                 exclude_ids=exclude,
                 exclude_clusters=exclude_clusters,
                 exclude_compilations=exclude_compilations,
+                aggregation=aggregation,
             )
             if users
             else self._recommend_similar(
@@ -708,10 +1279,16 @@ class GameViewSet(PermissionsModelViewSet):
 
         del like, path_light, recommender
 
-        key = users[0].lower() if len(users) == 1 else "_all"
-        recommendation = recommendation.xs(axis=1, key=key)
-        recommendation.sort_values("rank", inplace=True)
-        recommendation = list(recommendation.itertuples(index=True))
+        fields = _game_fields_param(request)
+
+        export = request.query_params.get("export")
+        if export:
+            return self._export_recommendation(
+                recommendation=recommendation,
+                with_rating=bool(users),
+                export_format=export,
+                fields=fields,
+            )
 
         page = self.paginate_queryset(recommendation)
         if page is None:
@@ -722,28 +1299,162 @@ class GameViewSet(PermissionsModelViewSet):
             paginate = True
         del page
 
-        recommendation = {game.Index: game for game in recommendation}
-        queryset = self.filter_queryset(self.get_queryset())
-        if include:
-            queryset |= self.get_queryset().filter(bgg_id__in=include)
-        games = queryset.filter(bgg_id__in=recommendation)
-
-        for game in games:
-            rec = recommendation[game.bgg_id]
-            game.rec_rank = int(rec.rank)
-            game.rec_rating = rec.score if users else None
-            game.rec_stars = rec.stars if users and hasattr(rec, "stars") else None
-        games = sorted(games, key=lambda game: game.rec_rank)
+        games = self._recommended_games(recommendation, bool(users), fields)
         del recommendation
 
-        serializer = self.get_serializer(instance=games, many=True)
-        del games
+        return self.get_paginated_response(games) if paginate else Response(games)
 
-        return (
-            self.get_paginated_response(serializer.data)
-            if paginate
-            else Response(serializer.data)
+    def _recommended_games(self, recommendation, with_rating, fields=None):
+        """Serialized games for the given ranked recommendations, in order."""
+        overlays = {
+            rec.bgg_id: {
+                "rec_rank": int(rec.rank),
+                "rec_rating": float(rec.score) if with_rating else None,
+                "rec_stars": None,
+            }
+            for rec in recommendation
+        }
+        return serialize_games(overlays, overlays, fields)
+
+    def _export_recommendation(
+        self,
+        *,
+        recommendation,
+        with_rating,
+        export_format,
+        fields=None,
+    ):
+        """Stream the complete ranked list, fetching games in chunks."""
+
+        if export_format not in ("csv", "jsonl"):
+            raise ValidationError({"export": "must be one of csv, jsonl"})
+
+        def rows():
+            for start in range(0, len(recommendation), EXPORT_CHUNK_SIZE):
+                yield from self._recommended_games(
+                    recommendation[start : start + EXPORT_CHUNK_SIZE],
+                    with_rating,
+                    fields,
+                )
+
+        if export_format == "csv":
+            header = PaginatedCSVGameRenderer.header
+            if fields is not None:
+                header = [name for name in header if name in fields]
+            content = CSVStreamingRenderer().render(
+                rows(),
+                renderer_context={"header": header},
+            )
+            content_type = "text/csv; charset=utf-8"
+        else:
+            content = (
+                json.dumps(
+                    row,
+                    cls=JSONEncoder,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                )
+                + "\n"
+                for row in rows()
+            )
+            content_type = "application/x-ndjson; charset=utf-8"
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="recommendations.{export_format}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=("POST",),
+        permission_classes=(AlwaysAllowAny,),
+    )
+    def recommend_batch(self, request, format=None):
+        """Top recommendations for many users at once."""
+
+        users = clear_list(
+            user.lower() for user in _extract_params(request, "user", str)
+        )
+        if not users:
+            raise ValidationError({"user": "at least one user is required"})
+        if len(users) > settings.MAX_BATCH_USERS:
+            raise ValidationError(
+                {"user": f"at most {settings.MAX_BATCH_USERS} users are allowed"}
+            )
+
+        path_light = getattr(settings, "LIGHT_RECOMMENDER_PATH", None)
+        recommender = load_recommender(path=path_light, site="light")
+        if recommender is None:
+            raise NotFound("unable to load recommender")
+
+        num_games = parse_int(_first_param(request, "num_games")) or PAGE_SIZE
+        num_games = min(num_games, MAX_BATCH_GAMES)
+        include = frozenset(_extract_params(request, "include", parse_int))
+        exclude = frozenset(_extract_params(request, "exclude", parse_int))
+        exclude_compilations = parse_bool(
+            _first_param(request, "exclude_compilations", default=True)
+        )
+        exclude_known = parse_bool(_first_param(request, "exclude_known"))
+        exclude_owned = parse_bool(_first_param(request, "exclude_owned"))
+        exclude_wishlist = parse_int(_first_param(request, "exclude_wishlist"))
+        exclude_play_count = parse_int(_first_param(request, "exclude_play_count"))
+        exclude_clusters = parse_bool(_first_param(request, "exclude_clusters"))
+
+        masks = game_masks(recommender)
+        candidates = self._included_games(
+            recommender=recommender,
+            include_ids=include,
+            exclude_ids=exclude,
+            exclude_compilations=exclude_compilations,
+            exclude_clusters=exclude_clusters,
+        )
+
+        def excluded(user):
+            # Explicitly included games are never excluded
+            return self._excluded_games(
+                masks=masks,
+                user=user,
+                exclude_compilations=False,
+                exclude_known=exclude_known,
+                exclude_owned=exclude_owned,
+                exclude_wishlist=exclude_wishlist,
+                exclude_play_count=exclude_play_count,
+                exclude_clusters=exclude_clusters,
+            ) & ~masks.mask(include)
+
+        per_user = (
+            exclude_known or exclude_owned or exclude_wishlist or exclude_play_count
         )
+        known = [user for user in users if user in recommender.known_users]
+        unknown = [user for user in users if user not in recommender.known_users]
+
+        def results():
+            for user, bgg_ids, scores in top_per_user(
+                recommender=recommender,
+                users=known,
+                candidates=candidates,
+                count=num_games,
+                excluded=excluded if per_user else None,
+            ):
+                yield {
+                    "user": user,
+                    "bgg_id": bgg_ids.tolist(),
+                    "score": scores.tolist(),
+                }
+            for user in unknown:
+                yield {"user": user, "bgg_id": [], "score": []}
+
+        if parse_bool(_first_param(request, "stream")):
+            return StreamingHttpResponse(
+                (
+                    json.dumps(result, separators=(",", ":")) + "\n"
+                    for result in results()
+                ),
+                content_type="application/x-ndjson",
+            )
+
+        return Response({"results": list(results())})
 
     @action(
         detail=False,
@@ -837,26 +1548,44 @@ class GameViewSet(PermissionsModelViewSet):
     @action(detail=True)
     def similar(self, request, pk=None, format=None):
         """Find games similar to this game."""
+        return self._cached_response(request, "similar", self._similar, pk=pk)
 
-        path_light = getattr(settings, "LIGHT_RECOMMENDER_PATH", None)
-        recommender = load_recommender(path=path_light, site="light")
+    def _precomputed_similar(self, request, pk):
+        similar_games = load_similar_games()
+        games = similar_games.similar(pk) if similar_games is not None else None
+        if games is None:
+            return None
 
-        if recommender is None:
-            raise NotFound(f"cannot find similar games to <{pk}>")
+        if self._filtered(request):
+            table = game_table()
+            games = games[
+                np.isin(games, table.bgg_id[self._filtered_games_mask(table)])
+            ]
+
+        return games.tolist()
 
+    def _similar(self, request, pk=None):
+        fields = _game_fields_param(request)
         pk = parse_int(pk)
-        include_ids = self._included_games(
-            recommender=recommender,
-            exclude_ids=pk,
-            exclude_compilations=True,
-            exclude_clusters=True,
-        )
-        games = [
-            game
-            for game in recommender.similar_games([pk]).index
-            if game in include_ids
-        ]
-        del path_light, recommender, include_ids
+        games = self._precomputed_similar(request, pk) if pk is not None else None
+
+        if games is None:
+            path_light = getattr(settings, "LIGHT_RECOMMENDER_PATH", None)
+            recommender = load_recommender(path=path_light, site="light")
+
+            if recommender is None or pk not in recommender.known_games:
+                raise NotFound(f"cannot find similar games to <{pk}>")
+
+            candidates = self._included_games(
+                recommender=recommender,
+                exclude_ids=pk,
+                exclude_compilations=True,
+                exclude_clusters=True,
+            )
+            similar = recommender.similar_games([pk]).index
+            positions = game_masks(recommender).indexes(similar)
+            games = similar[candidates[positions]].tolist()
+            del path_light, recommender, candidates, similar, positions
 
         page = self.paginate_queryset(games)
         if page is None:
@@ -867,23 +1596,9 @@ class GameViewSet(PermissionsModelViewSet):
             paginate = True
         del page
 
-        games = {game: i + 1 for i, game in enumerate(games)}
-        results = self.get_queryset().filter(bgg_id__in=games)
-        for game in results:
-            game.sort_rank = games[game.bgg_id]
-        del games
-
-        serializer = self.get_serializer(
-            instance=sorted(results, key=lambda game: game.sort_rank),
-            many=True,
-        )
-        del results
+        games = serialize_games(games, fields=fields)
 
-        return (
-            self.get_paginated_response(serializer.data)
-            if paginate
-            else Response(serializer.data)
-        )
+        return self.get_paginated_response(games) if paginate else Response(games)
 
     @action(detail=True)
     def rankings(self, request, pk=None, format=None):
@@ -900,6 +1615,20 @@ class GameViewSet(PermissionsModelViewSet):
             ),
         }
         filters = {k: v for k, v in filters.items() if v}
+
+        ranking_types = filters.get("ranking_type__in") or [
+            ranking_type for ranking_type, _ in Ranking.TYPES
+        ]
+        if use_series(ranking_types):
+            return Response(
+                game_rankings(
+                    game_id=parse_int(pk),
+                    ranking_types=filters.get("ranking_type__in"),
+                    date_gte=filters.get("date__gte"),
+                    date_lte=filters.get("date__lte"),
+                )
+            )
+
         queryset = Ranking.objects.filter(**filters)
         serializer = RankingSerializer(
             queryset, many=True, context=self.get_serializer_context()
@@ -908,7 +1637,11 @@ class GameViewSet(PermissionsModelViewSet):
 
     @action(detail=False)
     def history(self, request, format=None):
-        """History of the top rankings."""
+        """History of the top rankings.
+
+        With columnar=true, return one shared date axis and per-game rank
+        arrays instead of a list of rankings per game.
+        """
 
         top = parse_int(request.query_params.get("top")) or 100
         ranking_type = request.query_params.get("ranking_type") or Ranking.BGG
@@ -923,31 +1656,79 @@ class GameViewSet(PermissionsModelViewSet):
             ),
         }
         filters = {k: v for k, v in filters.items() if v}
-        queryset = Ranking.objects.filter(**filters)
 
-        last_date = queryset.filter(rank=1).dates("date", "day", order="ASC").last()
-        games = [
-            r.game
-            for r in queryset.filter(date=last_date, rank__lte=top)
-            .order_by("rank")
-            .select_related("game")
-        ]
+        last_date = (
+            last_number_one(
+                ranking_type=ranking_type,
+                date_gte=filters.get("date__gte"),
+                date_lte=filters.get("date__lte"),
+            )
+            if use_catalogue((ranking_type,))
+            else None
+        )
+
+        if use_series((ranking_type,)):
+            bgg_ids, rankings = ranking_history(
+                ranking_type=ranking_type,
+                top=top,
+                date_gte=filters.get("date__gte"),
+                date_lte=filters.get("date__lte"),
+                last_date=last_date,
+            )
+        else:
+            queryset = Ranking.objects.filter(**filters)
+            if last_date is None:
+                last_date = (
+                    queryset.filter(rank=1).dates("date", "day", order="ASC").last()
+                )
+            bgg_ids = list(
+                queryset.filter(date=last_date, rank__lte=top)
+                .order_by("rank")
+                .values_list("game_id", flat=True)
+            )
+            # One ordered scan over all rankings of the top games
+            rankings = (
+                queryset.filter(game__in=bgg_ids)
+                .order_by("date")
+                .values_list("game_id", "rank", "date")
+            )
+
+        games = serialize_games(bgg_ids, fields=_game_fields_param(request))
 
         assert len(games) == top
 
-        game_ids = frozenset(g.bgg_id for g in games)
-        rankings = queryset.filter(game__in=game_ids).order_by("date")
+        if parse_bool(request.query_params.get("columnar")):
+            dates = {}
+            ranks = {bgg_id: {} for bgg_id in bgg_ids}
+            for bgg_id, rank, date in rankings:
+                ranks[bgg_id][dates.setdefault(date, len(dates))] = rank
+            return Response(
+                {
+                    "ranking_type": ranking_type,
+                    "dates": list(dates),
+                    "games": games,
+                    "ranks": [
+                        [ranks[bgg_id].get(pos) for pos in range(len(dates))]
+                        for bgg_id in bgg_ids
+                    ],
+                }
+            )
+
+        grouped = {bgg_id: [] for bgg_id in bgg_ids}
+        for bgg_id, rank, date in rankings:
+            # Same fields as RankingSerializer
+            grouped[bgg_id].append(
+                {
+                    "ranking_type": ranking_type,
+                    "rank": rank,
+                    "date": date.isoformat(),
+                    "game": bgg_id,
+                }
+            )
 
         data = [
-            {
-                "game": self.get_serializer(game).data,
-                "rankings": RankingSerializer(
-                    rankings.filter(game=game.bgg_id),
-                    many=True,
-                    context=self.get_serializer_context(),
-                ).data,
-            }
-            for game in games
+            {"game": game, "rankings": grouped[bgg_id]}
+            for bgg_id, game in zip(bgg_ids, games)
         ]
         return Response(data)
 
@@ -959,6 +1740,11 @@ class GameViewSet(PermissionsModelViewSet):
             raise NotFound("unable to retrieve latest update")
         return Response({"updated_at": updated_at})
 
+    @action(detail=False)
+    def cache_stats(self, request, format=None):
+        """Hit and miss counters of the response and count caches."""
+        return Response({**response_cache().info(), "counts": count_cache().info()})
+
     @action(detail=False)
     def version(self, request, format=None):
         """Get project and server version."""
@@ -968,44 +1754,25 @@ class GameViewSet(PermissionsModelViewSet):
     def stats(self, request, format=None):
         """get games stats"""
 
-        result = {"updated_at": model_updated_at()}
-
         top_games = next(_parse_ints(request.query_params.get("top_games")), 100)
         top_items = next(_parse_ints(request.query_params.get("top_items")), 10)
 
-        for site_key, site_rank in self.stats_sites.items():
-            site_filters = {f"{site_rank}__isnull": False}
-            games = frozenset(
-                self.filter_queryset(self.get_queryset())
-                .filter(**site_filters)
-                .order_by(site_rank)[:top_games]
-                .values_list("bgg_id", flat=True)
-            )
-            total = len(games)
-            site_result = {"total": total}
-            result[site_key] = site_result
-
-            for key, (queryset, field, serializer_class) in self.stats_models.items():
-                filters = {f"{field}__in": games}
-                objs = (
-                    queryset.annotate(
-                        top=Count(field, filter=Q(**filters)),
-                        best=Min(f"{field}__{site_rank}"),
-                    )
-                    .filter(top__gt=0)
-                    .order_by("-top", "best")[:top_items]
-                )
-                # pylint: disable=not-callable
-                serializer = serializer_class(
-                    objs, many=True, context=self.get_serializer_context()
-                )
-                for d, obj in zip(serializer.data, objs):
-                    d["count"] = obj.top
-                    d["pct"] = 100 * obj.top / total if total else 0
-                    d["best"] = obj.best
-                site_result[key] = serializer.data
+        table = game_table()
+        filtered = self._filtered_games_mask(table)
 
-        return Response(result)
+        if filtered.all():
+            snapshot = stats_snapshot(top_games, top_items)
+            if snapshot is not None:
+                return Response(snapshot)
+
+        return Response(
+            games_stats(
+                mask=filtered,
+                top_games=top_games,
+                top_items=top_items,
+                context=self.get_serializer_context(),
+            )
+        )
 
 
 class PersonViewSet(PermissionsModelViewSet):
@@ -1025,7 +1792,7 @@ class PersonViewSet(PermissionsModelViewSet):
         queryset = person.artist_of if role == "artist" else person.designer_of
 
         ordering = _parse_parts(request.query_params.getlist("ordering"))
-        queryset = queryset.order_by(*ordering)
+        queryset = prefetch_game_relations(queryset.order_by(*ordering))
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -1096,21 +1863,12 @@ class UserViewSet(PermissionsModelViewSet):
 
         top_games = next(_parse_ints(request.query_params.get("top_games")), 100)
 
+        table = game_table()
+        collection = user_collection(user.name)
+
         for key, rank in self.stats_sites.items():
-            games = frozenset(
-                Game.objects.filter(**{f"{rank}__lte": top_games})
-                .order_by()
-                .values_list("bgg_id", flat=True)
-            )
-            filters = {"game__in": games}
-            collection = user.collection_set.filter(**filters)
-            result = {
-                "total": len(games),
-                "owned": collection.filter(owned=True).count(),
-                "played": collection.filter(play_count__gt=0).count(),
-                "rated": collection.filter(rating__isnull=False).count(),
-            }
-            data[key] = result
+            games = table.ranked(rank, top_games)
+            data[key] = {"total": len(games), **collection.summary(games)}
 
         return Response(data)
 
@@ -1205,7 +1963,7 @@ class RankingFilter(FilterSet):
         }
 
 
-class RankingPagination(PageNumberPagination):
+class RankingPagination(CachedCountPagination):
     """Ranking pagination."""
 
     page_size = 100
@@ -1213,12 +1971,14 @@ class RankingPagination(PageNumberPagination):
     max_page_size = 1000
 
 
-class RankingViewSet(PermissionsModelViewSet):
+class RankingViewSet(KeysetPaginationMixin, PermissionsModelViewSet):
     """Ranking view set."""
 
     # pylint: disable=no-member
     queryset = Ranking.objects.all()
     ordering = ("ranking_type", "date", "rank")
+    keyset_ordering = ("ranking_type", "date", "rank", "id")
+    keyset_actions = ("list", "games")
     serializer_class = RankingSerializer
     pagination_class = RankingPagination
 
@@ -1235,14 +1995,37 @@ class RankingViewSet(PermissionsModelViewSet):
     # pylint: disable=redefined-builtin,unused-argument
     @action(detail=False)
     def dates(self, request, format=None):
-        """Find all available dates with rankings."""
+        """Find all available dates with rankings.
 
-        query_set = self.get_queryset().order_by("ranking_type", "date")
+        With details=true, also return the number of rankings and the rank
+        range on each date.
+        """
 
         ranking_types = clear_list(_extract_params(request, "ranking_type"))
+        details = parse_bool(next(_extract_params(request, "details"), None))
+
+        if use_catalogue(ranking_types):
+            query_set = RankingDate.objects.order_by("ranking_type", "date")
+            if ranking_types:
+                query_set = query_set.filter(ranking_type__in=ranking_types)
+            if details:
+                return Response(
+                    query_set.values(
+                        "ranking_type", "date", "count", "min_rank", "max_rank"
+                    )
+                )
+            return Response(query_set.values("ranking_type", "date"))
+
+        query_set = self.get_queryset().order_by("ranking_type", "date")
         if ranking_types:
             query_set = query_set.filter(ranking_type__in=ranking_types)
 
+        if details:
+            return Response(
+                query_set.values("ranking_type", "date").annotate(
+                    count=Count("id"), min_rank=Min("rank"), max_rank=Max("rank")
+                )
+            )
         return Response(query_set.values("ranking_type", "date").distinct())
 
     @action(detail=False)
@@ -1252,6 +2035,11 @@ class RankingViewSet(PermissionsModelViewSet):
         fat = parse_bool(next(_extract_params(request, "fat"), None))
 
         query_set = self.filter_queryset(self.get_queryset())
+        if fat:
+            query_set = prefetch_game_relations(
+                query_set.select_related("game"),
+                prefix="game__",
+            )
         page = self.paginate_queryset(query_set)
 
         if page is not None:
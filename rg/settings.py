@@ -2,6 +2,7 @@
 
 import os
 from datetime import timezone
+from pathlib import Path
 
 from pytility import parse_bool, parse_date, parse_int
 
@@ -90,13 +91,39 @@ SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+SQLITE_PATH = os.path.join(DATA_DIR, "db.sqlite3")
+# Only for serving a finished database: immutable skips all locking and
+# change detection, so nothing may write to the file while the server runs
+SQLITE_IMMUTABLE = parse_bool(os.getenv("SQLITE_IMMUTABLE"))
+# Serve from a shared in-memory copy, loaded by rg.wsgi when the worker boots
+SQLITE_IN_MEMORY = parse_bool(os.getenv("SQLITE_IN_MEMORY"))
+# Connections are per thread, None keeps them open indefinitely
+CONN_MAX_AGE = parse_int(os.getenv("CONN_MAX_AGE"))
+if CONN_MAX_AGE is None and not SQLITE_IMMUTABLE:
+    CONN_MAX_AGE = 0
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(DATA_DIR, "db.sqlite3"),
+        "NAME": (
+            "file:rg?mode=memory&cache=shared"
+            if SQLITE_IN_MEMORY
+            else Path(SQLITE_PATH).as_uri() + "?mode=ro&immutable=1"
+            if SQLITE_IMMUTABLE
+            else SQLITE_PATH
+        ),
+        "CONN_MAX_AGE": CONN_MAX_AGE,
     }
 }
 
+SQLITE_PRAGMAS = {
+    "mmap_size": parse_int(os.getenv("SQLITE_MMAP_SIZE")) or 256 * 1024 * 1024,
+    "cache_size": -(parse_int(os.getenv("SQLITE_CACHE_SIZE_KB")) or 64 * 1024),
+    "temp_store": "MEMORY",
+}
+if SQLITE_IMMUTABLE or SQLITE_IN_MEMORY:
+    SQLITE_PRAGMAS["query_only"] = "ON"
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -143,10 +170,16 @@ WHITENOISE_INDEX_FILE = True
 # REST framework
 
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "games.pagination.CachedCountPagination",
     "PAGE_SIZE": 25,
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
     "DEFAULT_THROTTLE_RATES": {"anon": "1/hour"},
+    "DEFAULT_RENDERER_CLASSES": (
+        "games.renderers.FastJSONRenderer"
+        if parse_bool(os.getenv("FAST_JSON_RENDERER", "true"))
+        else "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 # API proxy
@@ -156,8 +189,46 @@ API_PROXY = {"HOST": "https://news.recommend.games"}
 
 RECOMMENDER_PATH = os.path.join(DATA_DIR, "recommender_bgg")
 LIGHT_RECOMMENDER_PATH = os.path.join(DATA_DIR, "recommender_light.npz")
+SIMILAR_GAMES_PATH = os.path.join(DATA_DIR, "similar_games")
+STATS_SNAPSHOT_PATH = os.path.join(DATA_DIR, "stats_snapshot.json")
+# (top_games, top_items) combinations to precompute
+STATS_SNAPSHOT_VARIANTS = ((100, 10), (100, 25), (250, 10), (250, 25), (1000, 10))
 STAR_PERCENTILES = (0.165, 0.365, 0.615, 0.815, 0.915, 0.965, 0.985, 0.995)
 
+# Seconds between checks for new data, which invalidate the caches
+DATA_VERSION_TTL = parse_int(os.getenv("DATA_VERSION_TTL", "5"))
+
+RESPONSE_CACHE_ENABLED = parse_bool(os.getenv("RESPONSE_CACHE_ENABLED", "true"))
+RESPONSE_CACHE_MAX_BYTES = (
+    parse_int(os.getenv("RESPONSE_CACHE_MAX_BYTES")) or 64 * 1024 * 1024
+)
+RESPONSE_CACHE_FORMATS = ("json", "csv")
+RESPONSE_CACHE_TTL = {
+    "recommend": parse_int(os.getenv("RESPONSE_CACHE_TTL_RECOMMEND")) or 60 * 60,
+    "similar": parse_int(os.getenv("RESPONSE_CACHE_TTL_SIMILAR")) or 24 * 60 * 60,
+}
+
+# Largest number of users per request to games/recommend_batch
+MAX_BATCH_USERS = parse_int(os.getenv("MAX_BATCH_USERS")) or 1_000
+
+COUNT_CACHE_ENABLED = parse_bool(os.getenv("COUNT_CACHE_ENABLED", "true"))
+COUNT_CACHE_MAX_ENTRIES = parse_int(os.getenv("COUNT_CACHE_MAX_ENTRIES")) or 10_000
+
+# Read rankings from packed per-game series where available
+RANKING_SERIES_ENABLED = parse_bool(os.getenv("RANKING_SERIES_ENABLED", "true"))
+
+CONDITIONAL_GET_ENABLED = parse_bool(os.getenv("CONDITIONAL_GET_ENABLED", "true"))
+CACHE_CONTROL_MAX_AGE = {
+    "default": parse_int(os.getenv("CACHE_CONTROL_MAX_AGE")) or 60 * 60,
+    "recommend": 5 * 60,
+    "similar": 24 * 60 * 60,
+    "rankings": 24 * 60 * 60,
+    "history": 24 * 60 * 60,
+    "dates": 24 * 60 * 60,
+    "updated_at": 5 * 60,
+    "version": 5 * 60,
+}
+
 MODEL_UPDATED_FILE = os.path.join(DATA_DIR, "updated_at")
 PROJECT_VERSION_FILE = os.path.join(BASE_DIR, "VERSION")
 
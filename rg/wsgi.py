@@ -2,9 +2,15 @@
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rg.settings")
 
 # pylint: disable=invalid-name
 application = get_wsgi_application()
+
+if settings.SQLITE_IN_MEMORY:
+    from games.database import load_into_memory
+
+    load_into_memory()